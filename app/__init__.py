@@ -9,6 +9,9 @@ from datetime import timedelta
 
 
 from .config import Config
+from .mail_dispatcher import MailDispatcher
+from . import instrumentation
+from .utils.db_engine import configure_sqlite, engine_options
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -16,6 +19,7 @@ login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 migrate = Migrate()
 mail = Mail()  # ADD THIS LINE
+mail_dispatcher = MailDispatcher()
 
 
 def create_app(config_class=Config):
@@ -23,12 +27,17 @@ def create_app(config_class=Config):
     app.jinja_env.globals.update(pytz=pytz, timedelta=timedelta)
 
     app.config.from_object(config_class)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
 
     # Initialize extensions with app
     db.init_app(app)
+    with app.app_context():
+        configure_sqlite(db.engine, app.config)
+        instrumentation.init_app(app, db.engine)
     login_manager.init_app(app)
     migrate.init_app(app, db)
     mail.init_app(app)  # ADD THIS LINE
+    mail_dispatcher.init_app(app, mail)
 
     # Ensure upload directories exist
     os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'documents'), exist_ok=True)
@@ -39,10 +48,14 @@ def create_app(config_class=Config):
     from app.routes.documents import documents_bp
     from app.routes.signatures import signatures_bp
     from app.routes.employees import employees_bp
+    from app.routes.metrics import metrics_bp
+    from app.routes.autocomplete import autocomplete_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(documents_bp)
     app.register_blueprint(signatures_bp, url_prefix='/signatures')
     app.register_blueprint(employees_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(autocomplete_bp)
 
     return app
\ No newline at end of file
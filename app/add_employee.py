@@ -1,6 +1,11 @@
 # add_employee.py
 from app import create_app, db
 from app.models import User
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash
+import csv
+import os
 import secrets
 import string
 import sys
@@ -13,35 +18,93 @@ def generate_temp_password(length=8):
 
 
 def add_employee(username, email):
-    """Add an employee with a temporary password. Returns (success, message, temp_password)"""
-    app = create_app()
+    """Add an employee with a temporary password. Returns (success, message, temp_password)
 
-    with app.app_context():
-        # Check if user already exists by email or username
-        if User.query.filter_by(email=email).first():
-            return False, f"❌ User with email {email} already exists!", None
-        if User.query.filter_by(username=username).first():
-            return False, f"❌ User with username {username} already exists!", None
+    Runs against the current app context, so call it from a request or wrap it in app.app_context().
+    """
+    # Check if user already exists by email or username
+    if User.query.filter_by(email=email).first():
+        return False, f"❌ User with email {email} already exists!", None
+    if User.query.filter_by(username=username).first():
+        return False, f"❌ User with username {username} already exists!", None
+
+    # Generate temporary password
+    temp_password = generate_temp_password()
+
+    # Create new employee
+    employee = User(
+        username=username,
+        email=email,
+        role='employee'
+    )
+    employee.set_password(temp_password)
+
+    db.session.add(employee)
+    db.session.commit()
+
+    return True, f"✅ Employee added successfully!", temp_password
+
+
+def read_employee_csv(stream):
+    """Read (username, email) rows from a CSV file object. A header row is optional."""
+    rows = []
+    for row in csv.reader(stream):
+        cells = [cell.strip() for cell in row]
+        if not any(cells):
+            continue
+        if [cell.lower() for cell in cells[:2]] == ['username', 'email']:
+            continue
+        rows.append((cells[0], cells[1] if len(cells) > 1 else ''))
+    return rows
+
+
+def import_employees(rows):
+    """Create many employees in one transaction.
+
+    `rows` is an iterable of (username, email). Rows that are incomplete or clash
+    with an existing user or an earlier row are skipped. Password hashing (scrypt)
+    is the slow part, so it runs on a thread pool; hashlib releases the GIL while
+    hashing. Returns (created, skipped): created is a list of
+    (username, email, temp_password) and skipped a list of (username, email, reason).
+    """
+    rows = [(username.strip(), email.strip()) for username, email in rows]
+    usernames = {username for username, _ in rows if username}
+    emails = {email for _, email in rows if email}
 
-        # Generate temporary password
-        temp_password = generate_temp_password()
+    # One query each for existing usernames and emails
+    taken_usernames = {u for (u,) in db.session.query(User.username).filter(User.username.in_(usernames))} if usernames else set()
+    taken_emails = {e for (e,) in db.session.query(User.email).filter(User.email.in_(emails))} if emails else set()
 
-        # Create new employee
-        employee = User(
-            username=username,
-            email=email,
-            role='employee'
-        )
-        employee.set_password(temp_password)
+    accepted, skipped = [], []
+    for username, email in rows:
+        if not username or not email:
+            skipped.append((username, email, 'Username and email are required'))
+        elif email in taken_emails:
+            skipped.append((username, email, f'User with email {email} already exists'))
+        elif username in taken_usernames:
+            skipped.append((username, email, f'User with username {username} already exists'))
+        else:
+            taken_usernames.add(username)
+            taken_emails.add(email)
+            accepted.append((username, email, generate_temp_password()))
 
-        db.session.add(employee)
-        db.session.commit()
+    workers = current_app.config['EMPLOYEE_IMPORT_WORKERS'] or os.cpu_count()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        hashes = list(executor.map(generate_password_hash, [password for _, _, password in accepted]))
 
-        return True, f"✅ Employee added successfully!", temp_password
+    db.session.add_all([
+        User(username=username, email=email, role='employee', password_hash=password_hash)
+        for (username, email, _), password_hash in zip(accepted, hashes)
+    ])
+    db.session.commit()
+
+    return accepted, skipped
 
 
 def add_employee_cli(username, email):
-    success, message, temp_password = add_employee(username, email)
+    app = create_app()
+    with app.app_context():
+        success, message, temp_password = add_employee(username, email)
     print(f"\n{message}")
     if success:
         print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
@@ -53,12 +116,34 @@ def add_employee_cli(username, email):
         print(f"They should change their password after first login.")
 
 
+def import_employees_cli(csv_path):
+    app = create_app()
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        rows = read_employee_csv(f)
+    with app.app_context():
+        created, skipped = import_employees(rows)
+
+    print(f"\n✅ {len(created)} employee(s) added, {len(skipped)} skipped.")
+    if created:
+        print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        for username, email, temp_password in created:
+            print(f"{username}  {email}  {temp_password}")
+        print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        print(f"\n⚠️  Please share these credentials securely with the employees.")
+    for username, email, reason in skipped:
+        print(f"❌ Skipped {username or '?'} <{email or '?'}>: {reason}")
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
+    if len(sys.argv) == 3 and sys.argv[1] == '--csv':
+        import_employees_cli(sys.argv[2])
+    elif len(sys.argv) != 3:
         print("Usage: python add_employee.py <username> <email>")
+        print("       python add_employee.py --csv <employees.csv>")
         print("Example: python add_employee.py john john@company.com")
         print("\nThis will generate a temporary password automatically.")
+        print("The CSV needs username,email columns; a header row is optional.")
     else:
         username = sys.argv[1]
         email = sys.argv[2]
-        add_employee_cli(username, email)
\ No newline at end of file
+        add_employee_cli(username, email)
@@ -0,0 +1,94 @@
+# app/change_feed.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from flask import current_app
+from sqlalchemy import event, func
+
+from app import db
+from app.models import DocumentEvent
+
+MAX_EVENTS = 500  # Per poll; a client that is further behind polls again straight away
+PRUNE_INTERVAL = 3600  # Seconds between deletions of expired events
+
+_changed = threading.Condition()
+_generation = 0  # Bumped whenever a commit in this process records events
+_next_prune = 0.0
+
+
+def record_event(document, kind):
+    """Add an event for `document` to the session; it is published when the session commits.
+
+    Call before committing the change itself, so the two land in one transaction.
+    """
+    global _next_prune
+    if document.id is None:
+        db.session.flush()  # A new document needs its id
+    db.session.add(DocumentEvent(document_id=document.id, kind=kind, uploaded_by=document.uploaded_by))
+    db.session.info['document_events'] = True
+
+    now = time.monotonic()
+    if now >= _next_prune:
+        _next_prune = now + PRUNE_INTERVAL
+        cutoff = datetime.now(pytz.utc) - timedelta(seconds=current_app.config['CHANGE_FEED_RETENTION'])
+        # The newest event always stays, so ids carry on from it and stale cursors can be told apart
+        newest = db.session.query(func.max(DocumentEvent.id)).scalar_subquery()
+        DocumentEvent.query.filter(DocumentEvent.created_date < cutoff, DocumentEvent.id < newest) \
+            .delete(synchronize_session=False)
+
+
+def _after_commit(session):
+    global _generation
+    if session.info.pop('document_events', False):
+        with _changed:
+            _generation += 1
+            _changed.notify_all()
+
+
+def _after_rollback(session):
+    session.info.pop('document_events', None)
+
+
+event.listen(db.session, 'after_commit', _after_commit)
+event.listen(db.session, 'after_rollback', _after_rollback)
+
+
+def latest_event_id():
+    """Cursor for a dashboard rendered now: it has seen every event up to this one"""
+    return db.session.query(func.max(DocumentEvent.id)).scalar() or 0
+
+
+def is_expired(since):
+    """Whether events after `since` may already have been pruned"""
+    oldest = db.session.query(func.min(DocumentEvent.id)).scalar()
+    return oldest is not None and since < oldest - 1
+
+
+def events_after(since, uploaded_by=None):
+    query = DocumentEvent.query.filter(DocumentEvent.id > since)
+    if uploaded_by is not None:
+        query = query.filter(DocumentEvent.uploaded_by == uploaded_by)
+    return query.order_by(DocumentEvent.id).limit(MAX_EVENTS).all()
+
+
+def wait_for_events(since, uploaded_by, timeout):
+    """Events after `since` (only for documents uploaded by `uploaded_by`, if given), in id order.
+
+    Returns as soon as there are any, or with an empty list after `timeout`
+    seconds. Commits in this process wake waiters at once; events written by
+    other processes are picked up by the final check at the timeout. No
+    connection is held while waiting.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        with _changed:
+            generation = _generation
+        events = events_after(since, uploaded_by)
+        db.session.close()
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            return events
+        with _changed:
+            _changed.wait_for(lambda: _generation != generation, remaining)
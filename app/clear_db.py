@@ -2,11 +2,13 @@
 from app import create_app  # Import your app factory function
 from app.models import db, User, Document, Signature  # Import db and models
 import os
+import shutil
 
 UPLOAD_DIRS = [
     os.path.join(os.path.dirname(__file__), 'static', 'uploads', 'signatures'),
     os.path.join(os.path.dirname(__file__), 'static', 'uploads', 'documents'),
 ]
+BLOB_DIR = os.path.join(os.path.dirname(__file__), 'static', 'uploads', 'blobs')
 
 def clear_database():
     # Create the Flask app instance
@@ -29,6 +31,7 @@ def clear_database():
                         os.remove(file_path)
                 except Exception as e:
                     print(f"Error deleting {file_path}: {e}")
+    shutil.rmtree(BLOB_DIR, ignore_errors=True)
     print("🧹 Static uploaded files cleared!")
 
 
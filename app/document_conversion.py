@@ -0,0 +1,132 @@
+# app/document_conversion.py
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from flask import current_app
+
+from app import db
+from app.document_metadata import schedule_page_geometry
+from app.models import Document
+from app.page_previews import schedule_prerender
+from app.search_index import schedule_text_extraction
+from app.utils.blob_store import abandon, discard_temp, settle, store_file, temp_path
+from app.utils.word_convert import convert_to_pdf, init_worker
+
+_pool = None
+_pool_lock = threading.Lock()
+_lock = threading.Lock()  # Guards _inflight and the conversion columns of waiting documents
+_inflight = {}  # Content hash of a Word file -> future converting it
+
+
+def get_conversion_pool(app):
+    """The process-wide Word to PDF pool, created on first use.
+
+    Workers keep their LibreOffice profile between conversions, so only the
+    first conversion in each worker pays for setting one up. Workers are
+    spawned, not forked from the threaded server.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=app.config['CONVERSION_PROCESSES'], mp_context=get_context('spawn'),
+                                        initializer=init_worker, initargs=(app.config['SOFFICE_PATH'],))
+        return _pool
+
+
+def pdf_source(document):
+    """The PDF that is signed and previewed for a document, or None while a Word file has none yet"""
+    if document.file_type == 'pdf':
+        return document.file_path
+    if document.conversion_status == 'done':
+        return document.converted_file_path
+    return None
+
+
+def schedule_conversion(document):
+    """Convert an uploaded Word document to PDF in the background, e.g. right after upload.
+
+    Results are shared by content hash: a file already converted for another
+    document is reused at once, and identical files uploaded while one is
+    converting all get its result. Also restarts conversions that failed or were
+    lost with a restart, so it is safe to call again.
+    """
+    if document.file_type == 'pdf':
+        return
+    app = current_app._get_current_object()
+    with _lock:
+        if document.conversion_status == 'pending' and document.content_hash in _inflight:
+            return
+        converted = Document.query.filter(
+            Document.content_hash == document.content_hash,
+            Document.conversion_status == 'done'
+        ).first()
+        if converted:
+            document.converted_file_path = converted.converted_file_path
+            document.converted_content_hash = converted.converted_content_hash
+            document.conversion_status = 'done'
+            document.page_count = converted.page_count
+            document.page_geometry = converted.page_geometry
+            db.session.commit()
+            schedule_text_extraction(document.converted_file_path)  # Copies the text already indexed
+            return
+
+        document.conversion_status = 'pending'
+        db.session.commit()
+        if document.content_hash in _inflight:
+            return
+        out_path = temp_path('.pdf')
+        future = get_conversion_pool(app).submit(convert_to_pdf, document.file_path, out_path,
+                                                 app.config['SOFFICE_PATH'], app.config['CONVERSION_TIMEOUT'])
+        _inflight[document.content_hash] = future
+
+    content_hash = document.content_hash
+    future.add_done_callback(lambda f: _finish(app, content_hash, out_path, f))
+
+
+def _finish(app, content_hash, out_path, future):
+    """Record a conversion on every document waiting for it"""
+    with app.app_context():
+        with _lock:
+            pdf_path = None
+            try:
+                waiting = Document.query.filter_by(content_hash=content_hash, conversion_status='pending')
+                if future.exception():
+                    discard_temp(out_path)
+                    waiting.update({'conversion_status': 'failed'}, synchronize_session=False)
+                    db.session.commit()
+                    app.logger.error(f'Converting {content_hash} to PDF failed: {future.exception()}')
+                    return
+                out_path, page_count = future.result()
+                pdf_path, pdf_hash = store_file(out_path)
+                waiting.update({
+                    'converted_file_path': pdf_path,
+                    'converted_content_hash': pdf_hash,
+                    'conversion_status': 'done',
+                    'page_count': page_count,
+                }, synchronize_session=False)
+                db.session.commit()
+                settle(pdf_path)
+            except Exception as e:
+                db.session.rollback()
+                if pdf_path:
+                    abandon(pdf_path)
+                else:
+                    discard_temp(out_path)
+                app.logger.error(f'Recording the PDF conversion of {content_hash} failed: {str(e)}')
+                return
+            finally:
+                _inflight.pop(content_hash, None)
+        app.logger.info(f'Converted {content_hash} to PDF: {pdf_path}')
+        try:
+            schedule_page_geometry(pdf_path)
+        except Exception as e:
+            app.logger.error(f'Failed to schedule page measurement: {str(e)}')
+        try:
+            schedule_prerender(pdf_path, pdf_hash)
+        except Exception as e:
+            app.logger.error(f'Failed to schedule page previews: {str(e)}')
+        try:
+            schedule_text_extraction(pdf_path)
+        except Exception as e:
+            app.logger.error(f'Failed to schedule text extraction: {str(e)}')
@@ -0,0 +1,156 @@
+# app/document_metadata.py
+import json
+import math
+import os
+
+from flask import current_app
+from sqlalchemy import or_
+
+from app import db
+from app.models import Document
+from app.page_previews import get_render_pool
+from app.utils.page_render import page_geometry
+
+POSITION_TOLERANCE = 1  # Points a placement may start past the page edge, for rounding in the viewer
+
+
+def _uses(pdf_path):
+    return or_(Document.file_path == pdf_path, Document.converted_file_path == pdf_path)
+
+
+def _record(pdf_path, geometry):
+    """Store `geometry` (JSON) on every document whose PDF is the stored file `pdf_path`"""
+    Document.query.filter(_uses(pdf_path)).update(
+        {'page_geometry': geometry, 'page_count': len(json.loads(geometry))}, synchronize_session='fetch')
+
+
+def _known_geometry(pdf_path):
+    """Geometry already measured for another document with the same stored file, or None"""
+    return db.session.query(Document.page_geometry).filter(
+        _uses(pdf_path), Document.page_geometry.isnot(None)).limit(1).scalar()
+
+
+def schedule_page_geometry(pdf_path):
+    """Measure the pages of a stored PDF for the documents using it, e.g. right after upload.
+
+    Stored files are shared by content, so geometry measured for another
+    document with the same file is copied. Otherwise the PDF is opened once in
+    the page rendering pool. The page count found replaces the one counted
+    while the upload streamed in.
+    """
+    known = _known_geometry(pdf_path)
+    if known is not None:
+        _record(pdf_path, known)
+        db.session.commit()
+        return
+
+    app = current_app._get_current_object()
+    future = get_render_pool(app).submit(page_geometry, pdf_path)
+    future.add_done_callback(lambda f: _finish(app, pdf_path, f))
+
+
+def _finish(app, pdf_path, future):
+    if future.exception():
+        app.logger.error(f'Measuring the pages of {pdf_path} failed: {future.exception()}')
+        return
+    with app.app_context():
+        try:
+            _record(pdf_path, json.dumps(future.result()))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f'Recording the pages of {pdf_path} failed: {str(e)}')
+
+
+def get_page_geometry(document, pdf_path):
+    """Per-page geometry of `document`, whose signed and previewed PDF is `pdf_path` (see pdf_source).
+
+    A list of dicts with 'width', 'height', 'mediabox', 'cropbox' and
+    'rotation' (see page_render.page_geometry). Read from the document row;
+    documents stored before it was recorded, or still waiting for their
+    measurement, get theirs measured now and saved.
+    """
+    if document.page_geometry:
+        return json.loads(document.page_geometry)
+
+    geometry = _known_geometry(pdf_path)
+    if geometry is None:
+        geometry = json.dumps(get_render_pool(current_app).submit(page_geometry, pdf_path).result())
+    _record(pdf_path, geometry)
+    if document.file_size is None and os.path.exists(document.file_path):
+        document.file_size = os.path.getsize(document.file_path)
+    db.session.commit()
+    return json.loads(geometry)
+
+
+def get_page_geometries(documents):
+    """get_page_geometry for many (document, pdf_path) pairs. Returns {document id: geometry}.
+
+    Documents still without geometry are measured side by side in the page
+    rendering pool and saved with one commit. A document whose PDF could not be
+    measured is left out, and the error is logged.
+    """
+    geometries, measuring, waiting = {}, {}, []
+    pool = get_render_pool(current_app)
+    for document, pdf_path in documents:
+        if document.page_geometry:
+            geometries[document.id] = json.loads(document.page_geometry)
+            continue
+        if pdf_path not in measuring:
+            known = _known_geometry(pdf_path)
+            measuring[pdf_path] = known if known is not None else pool.submit(page_geometry, pdf_path)
+        waiting.append((document, pdf_path))
+    if not waiting:
+        return geometries
+
+    measured = {}
+    for pdf_path, found in measuring.items():
+        try:
+            measured[pdf_path] = found if isinstance(found, str) else json.dumps(found.result())
+        except Exception as e:
+            current_app.logger.error(f'Measuring the pages of {pdf_path} failed: {str(e)}')
+            continue
+        _record(pdf_path, measured[pdf_path])
+    for document, pdf_path in waiting:
+        if pdf_path not in measured:
+            continue
+        if document.file_size is None and os.path.exists(document.file_path):
+            document.file_size = os.path.getsize(document.file_path)
+        geometries[document.id] = json.loads(measured[pdf_path])
+    db.session.commit()
+    return geometries
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def position_error(positions, geometry):
+    """Why signature positions cannot be placed on pages with `geometry`, or None if they can.
+
+    Each position needs a page index that exists and an x/y inside that page;
+    a width or height, if given, must be a positive number.
+    """
+    if not isinstance(positions, list):
+        return 'Invalid position format'
+    for pos in positions:
+        if not isinstance(pos, dict) or 'page' not in pos or 'x' not in pos or 'y' not in pos:
+            return 'Invalid position format'
+        page = _number(pos['page'])
+        if page is None or page != int(page) or not 0 <= page < len(geometry):
+            return f"Page {pos['page']} does not exist; the document has {len(geometry)} page(s)"
+        x, y = _number(pos['x']), _number(pos['y'])
+        if x is None or y is None:
+            return 'Position coordinates must be numbers'
+        for size in ('width', 'height'):
+            if size in pos and not (_number(pos[size]) or 0) > 0:
+                return f'Position {size} must be a positive number'
+        box = geometry[int(page)]
+        if not (-POSITION_TOLERANCE <= x <= box['width'] + POSITION_TOLERANCE and
+                -POSITION_TOLERANCE <= y <= box['height'] + POSITION_TOLERANCE):
+            return f'Position ({x:g}, {y:g}) is outside page {int(page)}'
+    return None
@@ -1,50 +1,136 @@
 # app/email.py
+import atexit
+import threading
+
 from flask import current_app, url_for
 from flask_mail import Message
-from app import mail
+from app import mail, mail_dispatcher
+
+
+def build_message(subject, recipient, body):
+    return Message(
+        subject=subject,
+        recipients=[recipient],
+        body=body,
+        sender=current_app.config['MAIL_USERNAME']
+    )
 
 
 def send_email(subject, recipient, body):
-    """Send a simple email"""
+    """Send a simple email right away, on its own connection"""
     try:
-        msg = Message(
-            subject=subject,
-            recipients=[recipient],
-            body=body,
-            sender=current_app.config['MAIL_USERNAME']
-        )
-        mail.send(msg)
+        mail.send(build_message(subject, recipient, body))
         return True
     except Exception as e:
         current_app.logger.error(f'Failed to send email: {str(e)}')
         return False
 
 
-def send_document_notification(recipient_email, doc_data):
-    """Notify boss when a document needs signature"""
-    subject = "New Document Awaiting Signature"
-    # Generate document link
-    with current_app.app_context():
-        doc_link = url_for('documents.view_document', document_id=doc_data['id'], _external=True)
-    body = f"""
-Hello,
+def queue_email(subject, recipient, body):
+    """Hand an email to the background mail dispatcher. Returns False if the queue is full."""
+    try:
+        return mail_dispatcher.enqueue(build_message(subject, recipient, body))
+    except Exception as e:
+        current_app.logger.error(f'Failed to queue email: {str(e)}')
+        return False
+
 
-You have a new document awaiting your signature:
+# Document notifications waiting to be sent as one digest:
+# recipient -> (list of doc_data dicts, timer that flushes them)
+_pending_digests = {}
+_digest_lock = threading.Lock()
+_digest_exit_hook = False
 
-Document: {doc_data['original_filename']}
+
+def _document_details(doc_data):
+    doc_link = url_for('documents.view_document', document_id=doc_data['id'], _external=True)
+    return f"""Document: {doc_data['original_filename']}
 Client: {doc_data.get('client', '-')}
 Work: {doc_data.get('work', '-')}
 Type of Document: {doc_data.get('document_type', '-')}
 Comment: {doc_data.get('comment', '-')}
 
-View Document: {doc_link}
+View Document: {doc_link}"""
+
+
+def build_document_notification(documents):
+    """Subject and body for one or more documents awaiting signature"""
+    if len(documents) == 1:
+        subject = "New Document Awaiting Signature"
+        intro = "You have a new document awaiting your signature:"
+        details = _document_details(documents[0])
+    else:
+        subject = f"{len(documents)} New Documents Awaiting Signature"
+        intro = f"You have {len(documents)} new documents awaiting your signature:"
+        details = "\n\n".join(f"{i}. {_document_details(doc)}" for i, doc in enumerate(documents, 1))
+    body = f"""
+Hello,
+
+{intro}
+
+{details}
 
-Please log in to the E-Signature System to review and sign the document.
+Please log in to the E-Signature System to review and sign the {'document' if len(documents) == 1 else 'documents'}.
 
 Best regards,
 E-Signature System
 """
-    return send_email(subject, recipient_email, body)
+    return subject, body
+
+
+def send_document_notification(recipient_email, doc_data):
+    """Notify boss when a document needs signature
+
+    Notifications for the same recipient within MAIL_DIGEST_WINDOW seconds are
+    sent together as one digest email.
+    """
+    window = current_app.config['MAIL_DIGEST_WINDOW']
+    if not window:
+        subject, body = build_document_notification([doc_data])
+        return queue_email(subject, recipient_email, body)
+
+    global _digest_exit_hook
+    app = current_app._get_current_object()
+    flush_now = False
+    with _digest_lock:
+        if not _digest_exit_hook:
+            atexit.register(flush_document_digests, app)
+            _digest_exit_hook = True
+        documents, timer = _pending_digests.get(recipient_email, ([], None))
+        documents.append(doc_data)
+        if timer is None:
+            timer = threading.Timer(window, _flush_digest, args=(app, recipient_email))
+            timer.daemon = True
+            timer.start()
+        _pending_digests[recipient_email] = (documents, timer)
+        flush_now = len(documents) >= current_app.config['MAIL_DIGEST_MAX_DOCUMENTS']
+
+    if flush_now:
+        _flush_digest(app, recipient_email)
+    return True
+
+
+def _flush_digest(app, recipient_email):
+    with _digest_lock:
+        documents, timer = _pending_digests.pop(recipient_email, ([], None))
+    if timer is not None:
+        timer.cancel()
+    if not documents:
+        return
+    with app.app_context():
+        subject, body = build_document_notification(documents)
+        queue_email(subject, recipient_email, body)
+
+
+def flush_document_digests(app):
+    """Send every pending digest now (used at shutdown)"""
+    with _digest_lock:
+        recipients = list(_pending_digests)
+    for recipient_email in recipients:
+        _flush_digest(app, recipient_email)
+    # The mail queue's own exit hook may already have run
+    if recipients:
+        mail_dispatcher.shutdown()
 
 
 def send_signature_completion_notification(recipient_email, document_name, document_id):
@@ -65,4 +151,4 @@ You can now download or view the signed document here:
 Best regards,
 E-Signature System
 """
-    return send_email(subject, recipient_email, body)
\ No newline at end of file
+    return queue_email(subject, recipient_email, body)
\ No newline at end of file
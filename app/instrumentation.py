@@ -0,0 +1,194 @@
+# app/instrumentation.py
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+# Prometheus' default buckets, in seconds
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+_capture = threading.local()  # .phases is a list while capture_phases() is active on this thread
+
+
+class Metric:
+    """A Prometheus metric family kept in process memory, one series per label tuple"""
+
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _labels(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            series = sorted(self._series.items())
+            lines.extend(self._render_series(values, state) for values, state in series)
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def _render_series(self, values, total):
+        return f'{self.name}{self._labels(values)} {total}'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=SECONDS_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = buckets
+
+    def observe(self, labels, value):
+        with self._lock:
+            state = self._series.get(labels)
+            if state is None:
+                state = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]  # bucket counts, count, sum
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += 1
+            state[2] += value
+
+    def _render_series(self, values, state):
+        counts, count, total = state
+        lines = [f'{self.name}_bucket{self._labels(values, [("le", bound)])} {n}'
+                 for bound, n in zip(self.buckets, counts)]
+        lines.append(f'{self.name}_bucket{self._labels(values, [("le", "+Inf")])} {count}')
+        lines.append(f'{self.name}_sum{self._labels(values)} {total}')
+        lines.append(f'{self.name}_count{self._labels(values)} {count}')
+        return '\n'.join(lines)
+
+
+PHASE_SECONDS = Histogram('esign_phase_seconds', 'Time spent in each phase of signing, upload and dashboard work',
+                          ('pipeline', 'phase'))
+REQUEST_SECONDS = Histogram('esign_http_request_seconds', 'Request handling time by endpoint', ('endpoint',))
+REQUESTS = Counter('esign_http_requests_total', 'Requests by endpoint and status code', ('endpoint', 'status'))
+REQUEST_QUERIES = Histogram('esign_http_request_sql_queries', 'SQL queries run while handling one request',
+                            ('endpoint',), QUERY_COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = Histogram('esign_http_request_sql_seconds', 'Time one request spent in SQL queries',
+                                ('endpoint',))
+SQL_QUERIES = Counter('esign_sql_queries_total', 'SQL queries, including background work')
+SQL_SECONDS = Counter('esign_sql_seconds_total', 'Time spent in SQL queries, including background work')
+METRICS = (PHASE_SECONDS, REQUEST_SECONDS, REQUESTS, REQUEST_QUERIES, REQUEST_SQL_SECONDS, SQL_QUERIES, SQL_SECONDS)
+
+
+def record_phase(pipeline, phase, seconds):
+    """Record one timed phase. Inside a request it also goes into the Server-Timing header."""
+    phases = getattr(_capture, 'phases', None)
+    if phases is not None:
+        phases.append((pipeline, phase, seconds))
+        return
+    PHASE_SECONDS.observe((pipeline, phase), seconds)
+    if has_request_context():
+        timings = g.setdefault('phase_timings', {})
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(pipeline, phase):
+    """Time the body of a with block as one phase of a pipeline, e.g. timed('signing', 'write')"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(pipeline, phase, time.perf_counter() - start)
+
+
+@contextmanager
+def capture_phases():
+    """Collect phases recorded on this thread into a list instead of the registry.
+
+    For work in a worker process, whose registry nobody scrapes: return the list
+    with the result and pass it to observe_phases() in the web process.
+    """
+    _capture.phases = []
+    try:
+        yield _capture.phases
+    finally:
+        _capture.phases = None
+
+
+def observe_phases(phases):
+    for pipeline, phase, seconds in phases:
+        PHASE_SECONDS.observe((pipeline, phase), seconds)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(time.perf_counter() - conn.info['query_start'].pop())
+
+
+def _handle_error(context):
+    starts = context.connection.info.get('query_start') if context.connection is not None else None
+    if starts:
+        _record_query(time.perf_counter() - starts.pop())
+
+
+def _record_query(seconds):
+    SQL_QUERIES.inc()
+    SQL_SECONDS.inc(amount=seconds)
+    if has_request_context():
+        g.sql_queries = g.get('sql_queries', 0) + 1
+        g.sql_seconds = g.get('sql_seconds', 0.0) + seconds
+
+
+def _finish_request(response):
+    start = g.get('request_start')
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    endpoint = request.endpoint or 'unmatched'
+    queries = g.get('sql_queries', 0)
+    sql_seconds = g.get('sql_seconds', 0.0)
+    REQUEST_SECONDS.observe((endpoint,), elapsed)
+    REQUESTS.inc((endpoint, str(response.status_code)))
+    REQUEST_QUERIES.observe((endpoint,), queries)
+    REQUEST_SQL_SECONDS.observe((endpoint,), sql_seconds)
+
+    if current_app.config['SERVER_TIMING']:
+        entries = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in g.get('phase_timings', {}).items()]
+        entries.append(f'sql;dur={sql_seconds * 1000:.1f};desc="{queries} queries"')
+        entries.append(f'total;dur={elapsed * 1000:.1f}')
+        response.headers.add('Server-Timing', ', '.join(entries))
+    return response
+
+
+def init_app(app, engine):
+    """Time every request and count the SQL it runs on `engine`"""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+    @app.before_request
+    def start_request():
+        g.request_start = time.perf_counter()
+
+    app.after_request(_finish_request)
+
+
+def render_metrics(extra=()):
+    """Every metric in the Prometheus text format, followed by `extra` pre-rendered families"""
+    return '\n'.join([metric.render() for metric in METRICS] + list(extra)) + '\n'
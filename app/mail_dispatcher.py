@@ -0,0 +1,118 @@
+# app/mail_dispatcher.py
+import atexit
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class MailDispatcher:
+    """Sends queued Flask-Mail messages from a small pool of worker threads.
+
+    Each worker keeps one SMTP connection open while there is mail to send and
+    closes it after MAIL_CONNECTION_IDLE seconds without work, so a burst of
+    notifications costs one handshake per worker instead of one per email. The
+    queue is bounded: when it is full, enqueue() waits up to MAIL_ENQUEUE_TIMEOUT
+    seconds and then gives up, which pushes back on the caller instead of letting
+    memory grow. Failed sends are retried with exponential backoff on a fresh
+    connection.
+    """
+
+    def __init__(self, app=None, mail=None):
+        self.app = None
+        self.mail = None
+        self._queue = None
+        self._workers = []
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, mail)
+
+    def init_app(self, app, mail):
+        self.app = app
+        self.mail = mail
+        app.extensions['mail_dispatcher'] = self
+
+    def _start(self):
+        with self._lock:
+            if self._workers:
+                return
+            config = self.app.config
+            self._queue = queue.Queue(maxsize=config['MAIL_QUEUE_SIZE'])
+            for i in range(config['MAIL_WORKERS']):
+                worker = threading.Thread(target=self._run, args=(self.app,), name=f'mail-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            atexit.register(self.shutdown)
+
+    def enqueue(self, message):
+        """Queue a message for delivery. Returns False if the queue stayed full."""
+        self._start()
+        try:
+            self._queue.put(message, timeout=self.app.config['MAIL_ENQUEUE_TIMEOUT'])
+            return True
+        except queue.Full:
+            self.app.logger.error(f'Mail queue full, dropping email to {", ".join(message.recipients)}')
+            return False
+
+    def join(self):
+        """Block until everything queued so far has been handled"""
+        if self._queue is not None:
+            self._queue.join()
+
+    def shutdown(self, timeout=10):
+        """Deliver what is queued, then stop the workers"""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._queue.put(_STOP)
+        for worker in workers:
+            worker.join(timeout)
+
+    def _run(self, app):
+        with app.app_context():
+            connection = None
+            idle = app.config['MAIL_CONNECTION_IDLE']
+            while True:
+                try:
+                    # Only time out while holding a connection that could be closed
+                    message = self._queue.get(timeout=idle if connection else None)
+                except queue.Empty:
+                    connection = self._close(connection)
+                    continue
+
+                try:
+                    if message is _STOP:
+                        self._close(connection)
+                        return
+                    connection = self._deliver(app, connection, message)
+                finally:
+                    self._queue.task_done()
+
+    def _deliver(self, app, connection, message):
+        """Send one message, reconnecting and backing off on failure. Returns the open connection."""
+        max_retries = app.config['MAIL_MAX_RETRIES']
+        for attempt in range(max_retries + 1):
+            try:
+                if connection is None:
+                    connection = self.mail.connect()
+                    connection.__enter__()
+                connection.send(message)
+                return connection
+            except Exception as e:
+                connection = self._close(connection)
+                if attempt == max_retries:
+                    app.logger.error(f'Failed to send email to {", ".join(message.recipients)}: {str(e)}')
+                    return None
+                delay = app.config['MAIL_RETRY_BACKOFF'] * (2 ** attempt)
+                app.logger.warning(f'Email send failed, retrying in {delay}s: {str(e)}')
+                time.sleep(delay)
+
+    @staticmethod
+    def _close(connection):
+        if connection is not None:
+            try:
+                connection.__exit__(None, None, None)
+            except Exception:
+                pass  # The server may already have dropped us
+        return None
@@ -37,16 +37,35 @@ class User(UserMixin, db.Model):
 
 
 class Document(db.Model):
+    __table_args__ = (
+        # Dashboard lists, each in the order it is paged in (see keyset_page): all pending,
+        # pending/signed per uploader, and signed per signer
+        db.Index('ix_document_status_upload_date', 'status', 'upload_date', 'id'),
+        db.Index('ix_document_status_uploaded_by_upload_date', 'status', 'uploaded_by', 'upload_date', 'id'),
+        db.Index('ix_document_status_uploaded_by_signed_date', 'status', 'uploaded_by', 'signed_date', 'id'),
+        db.Index('ix_document_status_signed_by_signed_date', 'status', 'signed_by', 'signed_date', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255))
     original_filename = db.Column(db.String(255))
-    file_path = db.Column(db.String(255))
+    file_path = db.Column(db.String(255), index=True)  # Indexed for blob reference counts
     file_type = db.Column(db.String(10))  # 'pdf' or 'docx'
     uploaded_by = db.Column(db.Integer, db.ForeignKey('user.id'))
-    upload_date = db.Column(db.DateTime, default=lambda: datetime.now(pytz.utc))
+    upload_date = db.Column(db.DateTime, default=lambda: datetime.now(pytz.utc), index=True)
     status = db.Column(db.String(20), default='pending')  # 'pending', 'signed', 'rejected'
-    signed_file_path = db.Column(db.String(255), nullable=True)
+    signed_file_path = db.Column(db.String(255), nullable=True, index=True)
     signed_date = db.Column(db.DateTime, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of file_path, used as the ETag
+    signed_content_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of signed_file_path
+    page_count = db.Column(db.Integer, nullable=True)  # Counted while the upload streamed in, or on conversion
+    file_size = db.Column(db.BigInteger, nullable=True)  # Bytes in file_path, measured while the upload streamed in
+    # JSON list of page boxes, rotation and visible size of the PDF that is signed (see app/document_metadata.py)
+    page_geometry = db.Column(db.Text, nullable=True)
+    # Word uploads are converted to PDF for previews and signing (see app/document_conversion.py)
+    converted_file_path = db.Column(db.String(255), nullable=True, index=True)
+    converted_content_hash = db.Column(db.String(64), nullable=True)
+    conversion_status = db.Column(db.String(20), nullable=True)  # 'pending', 'done', 'failed'; None for PDFs
 
     # New fields for extra document details
     client = db.Column(db.String(120), nullable=True)
@@ -54,8 +73,7 @@ class Document(db.Model):
     document_type = db.Column(db.String(120), nullable=True)
     comment = db.Column(db.Text, nullable=True)
 
-    # New fields for signature placement
-    signature_placement = db.Column(db.Text, nullable=True)  # Store JSON of requested signature positions
+    # Where the employee asked for signatures is in SignaturePlacement
     signing_method = db.Column(db.String(20), nullable=True)  # 'auto' or 'manual'
 
     signed_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
@@ -80,6 +98,69 @@ class Signature(db.Model):
         return f'<Signature {self.id} of User {self.user_id}>'
 
 
+class SignaturePlacement(db.Model):
+    """A box the uploader marked for the boss's signature, initials or company signature"""
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id'), nullable=False, index=True)
+    page = db.Column(db.Integer, nullable=False)  # Page index, from 0
+    # Points from the top-left corner of the visible page, as the viewer measures them
+    x = db.Column(db.Float, nullable=False)
+    y = db.Column(db.Float, nullable=False)
+    width = db.Column(db.Float, nullable=True)  # None stamps the default box size
+    height = db.Column(db.Float, nullable=True)
+    type = db.Column(db.String(20), nullable=False, default='signature')  # 'signature', 'initial' or 'company'
+
+    document = db.relationship('Document', backref=db.backref(
+        'signature_placements', cascade='all, delete-orphan', order_by='SignaturePlacement.id'))
+
+    def __repr__(self):
+        return f'<SignaturePlacement {self.type} on page {self.page} of Document {self.document_id}>'
+
+
+class SigningJob(db.Model):
+    __table_args__ = (
+        # At most one queued or running job per document, so two requests cannot both enqueue one
+        db.Index('uq_signing_job_active_document', 'document_id', unique=True,
+                 sqlite_where=db.text("status IN ('queued', 'running')"),
+                 postgresql_where=db.text("status IN ('queued', 'running')"),
+                 mssql_where=db.text("status IN ('queued', 'running')")),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id'), index=True)
+    requested_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    status = db.Column(db.String(20), default='queued')  # 'queued', 'running', 'succeeded', 'failed'
+    signing_method = db.Column(db.String(20), nullable=True)  # 'auto' or 'manual'
+    positions = db.Column(db.Text)  # JSON of the positions to stamp, with their signature IDs
+    attempts = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_date = db.Column(db.DateTime, default=lambda: datetime.now(pytz.utc))
+    started_date = db.Column(db.DateTime, nullable=True)
+    finished_date = db.Column(db.DateTime, nullable=True)
+
+    document = db.relationship('Document', backref=db.backref('signing_jobs', cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<SigningJob {self.id} for Document {self.document_id} ({self.status})>'
+
+
+class DocumentEvent(db.Model):
+    """A document was uploaded, signed or deleted; dashboards follow these through /dashboard/changes"""
+    __table_args__ = (
+        db.Index('ix_document_event_uploaded_by_id', 'uploaded_by', 'id'),  # An employee's feed
+        {'sqlite_autoincrement': True},  # Ids are the feed cursor, so they are never reused
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer)  # No foreign key: deletion events outlive the document
+    kind = db.Column(db.String(20))  # 'uploaded', 'signed' or 'deleted'
+    uploaded_by = db.Column(db.Integer)
+    created_date = db.Column(db.DateTime, default=lambda: datetime.now(pytz.utc), index=True)
+
+    def __repr__(self):
+        return f'<DocumentEvent {self.id}: Document {self.document_id} {self.kind}>'
+
+
 @login_manager.user_loader
 def load_user(id):
     return User.query.get(int(id))
\ No newline at end of file
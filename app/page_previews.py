@@ -0,0 +1,147 @@
+# app/page_previews.py
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from flask import current_app
+
+from app.utils.page_render import render_pages
+
+# Zoom levels a client may ask for, by name. 'thumb' is the low-res placeholder.
+ZOOMS = {'thumb': 0.25, '1': 1.0, '1.5': 1.5, '2': 2.0, '3': 3.0}
+PRERENDER_ZOOMS = ('thumb', '1.5')  # What the viewer asks for first
+
+_pool = None
+_lock = threading.Lock()
+_inflight = {}  # Preview path -> future rendering it
+_cache_bytes = None  # Running total of the preview cache, measured on first use
+
+
+def get_render_pool(app):
+    """The process-wide rasterizing pool, created on first use.
+
+    PyMuPDF is not thread-safe, so all rendering happens in worker processes,
+    spawned rather than forked from the threaded server.
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=app.config['PREVIEW_PROCESSES'], mp_context=get_context('spawn'))
+        return _pool
+
+
+def cache_root():
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'previews')
+
+
+def cache_dir(content_hash):
+    """Previews are keyed by file content, so identical files share them and a signed copy gets its own"""
+    return os.path.join(cache_root(), content_hash[:2], content_hash)
+
+
+def preview_path(content_hash, page_index, zoom_name):
+    return os.path.join(cache_dir(content_hash), f'{zoom_name}-{page_index}.jpg')
+
+
+def get_preview(pdf_path, content_hash, page_index, zoom_name):
+    """Path of a rendered page image, rendering it now if it is not cached"""
+    out_path = preview_path(content_hash, page_index, zoom_name)
+    if os.path.exists(out_path):
+        os.utime(out_path)  # Mark as recently used for eviction
+        return out_path
+
+    app = current_app._get_current_object()
+    job = (page_index, ZOOMS[zoom_name], out_path)
+    with _lock:
+        future = _inflight.get(out_path)
+        shared = future is not None
+    if not shared:
+        future = _submit(app, pdf_path, [job])
+    try:
+        future.result()
+    except Exception:
+        # A background batch that failed part way says nothing about this page
+        if not shared:
+            raise
+    if not os.path.exists(out_path):
+        _submit(app, pdf_path, [job]).result()
+    return out_path
+
+
+def schedule_prerender(pdf_path, content_hash):
+    """Render thumbnails and first-screen previews in the background, e.g. right after upload"""
+    app = current_app._get_current_object()
+    pages = app.config['PREVIEW_PRERENDER_PAGES']
+    jobs = [
+        (page_index, ZOOMS[zoom_name], preview_path(content_hash, page_index, zoom_name))
+        for page_index in range(pages)
+        for zoom_name in PRERENDER_ZOOMS
+    ]
+    jobs = [job for job in jobs if not os.path.exists(job[2])]
+    if jobs:
+        _submit(app, pdf_path, jobs)
+
+
+def _submit(app, pdf_path, jobs):
+    paths = [out_path for _, _, out_path in jobs]
+    root = os.path.join(app.config['UPLOAD_FOLDER'], 'previews')
+    limit = app.config['PREVIEW_CACHE_SIZE_MB'] * 1024 * 1024
+    future = get_render_pool(app).submit(render_pages, pdf_path, jobs)
+    with _lock:
+        for out_path in paths:
+            _inflight[out_path] = future
+
+    def done(f):
+        with _lock:
+            for out_path in paths:
+                if _inflight.get(out_path) is f:
+                    del _inflight[out_path]
+        if f.exception():
+            app.logger.error(f'Rendering previews of {pdf_path} failed: {f.exception()}')
+            return
+        _account(root, limit, sum(size for _, size in f.result()))
+
+    future.add_done_callback(done)
+    return future
+
+
+def _account(root, limit, added):
+    global _cache_bytes
+    with _lock:
+        if _cache_bytes is None:
+            _cache_bytes = sum(size for _, _, size in _cached_files(root))
+        else:
+            _cache_bytes += added
+        over = _cache_bytes > limit
+    if over:
+        evict(root, int(limit * 0.9))
+
+
+def _cached_files(root):
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.endswith('.jpg'):
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, path, stat.st_size
+
+
+def evict(root, target):
+    """Delete the least recently used previews until the cache is at most `target` bytes"""
+    global _cache_bytes
+    files = sorted(_cached_files(root))
+    total = sum(size for _, _, size in files)
+    for _, path, size in files:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    with _lock:
+        _cache_bytes = total
@@ -0,0 +1,24 @@
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user, login_required
+
+from app.utils.autocomplete_index import FIELDS, suggest
+
+autocomplete_bp = Blueprint('autocomplete', __name__)
+
+
+@autocomplete_bp.route('/autocomplete/<field>')
+@login_required
+def suggestions(field):
+    """Values used on earlier uploads for one detail field ('client', 'work' or 'document_type').
+
+    Employees see the values from their own uploads; the boss sees everyone's.
+    """
+    if field not in FIELDS:
+        return jsonify({'success': False, 'message': 'Unknown field'}), 404
+    limit = max(1, min(request.args.get('limit', 10, type=int), current_app.config['AUTOCOMPLETE_MAX_SUGGESTIONS']))
+    user_id = None if current_user.is_boss() else current_user.id
+    return jsonify({
+        'success': True,
+        'suggestions': [{'value': value, 'count': count}
+                        for value, count in suggest(field, request.args.get('q', ''), limit, user_id)],
+    })
@@ -1,16 +1,28 @@
 import os
-import uuid
-import json
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, send_from_directory, \
     send_file, jsonify
 from datetime import datetime
 from flask_login import current_user, login_required
+from sqlalchemy.orm import joinedload, load_only
 from werkzeug.utils import secure_filename
 from app import db
 from app.models import Document, User
+from app.instrumentation import timed
+from app.change_feed import is_expired, latest_event_id, record_event, wait_for_events
+from app.document_conversion import pdf_source, schedule_conversion
+from app.document_metadata import get_page_geometry, position_error, schedule_page_geometry
+from app.page_previews import ZOOMS, get_preview, schedule_prerender
+from app.search_index import schedule_text_extraction, search
+from app.utils.blob_store import abandon, release, settle
+from app.utils.autocomplete_index import record_values
+from app.utils.lookup_cache import get_boss
+from app.utils.signature_placements import PLACEMENT_TYPES, get_positions, replace_positions
+from app.utils.upload_ingest import IngestError, abort_upload_session, append_upload_chunk, complete_upload_session, \
+    finish_upload, form_upload, get_upload_session, start_upload_session
+from app.utils.document_delivery import apply_cache_policy, document_etag, send_document
+from app.utils.pagination import keyset_page
 from app.email_service import send_document_notification, send_email
 from app.add_employee import add_employee
-import threading
 
 documents_bp = Blueprint('documents', __name__)
 
@@ -20,12 +32,31 @@ def allowed_file(filename):
         filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_DOCUMENT_EXTENSIONS']
 
 
-def async_send_document_notification(email, doc_data):
-    app = current_app._get_current_object()
-    def send_with_context():
-        with app.app_context():
-            send_document_notification(email, doc_data)
-    threading.Thread(target=send_with_context).start()
+# Columns the dashboard tables render; the text blobs stay unloaded
+LIST_COLUMNS = (Document.id, Document.original_filename, Document.uploaded_by, Document.upload_date,
+                Document.status, Document.signed_date, Document.signed_by, Document.page_count, Document.file_size)
+
+
+def dashboard_list_query(*criteria):
+    # populate_existing: a document signed between the pending and signed queries of one
+    # request must not keep the stale pending row (no signed_date) from the first query
+    return Document.query.options(
+        load_only(*LIST_COLUMNS),
+        joinedload(Document.uploader).load_only(User.username)
+    ).filter(*criteria).execution_options(populate_existing=True)
+
+
+def dashboard_section(document, user):
+    """The dashboard table ('pending' or 'signed') `user` sees `document` in, or None"""
+    if document is None:
+        return None
+    if user.is_boss():
+        if document.status == 'pending':
+            return 'pending'
+        return 'signed' if document.status == 'signed' and document.signed_by == user.id else None
+    if document.uploaded_by != user.id:
+        return None
+    return document.status if document.status in ('pending', 'signed') else None
 
 
 @documents_bp.route('/dashboard')
@@ -33,18 +64,176 @@ def async_send_document_notification(email, doc_data):
 def dashboard():
     if current_user.is_boss():
         # Boss sees pending documents from all users
-        pending_documents = Document.query.filter_by(status='pending').all()
-        signed_documents = Document.query.filter_by(status='signed', signed_by=current_user.id).all()
-        return render_template('boss/dashboard.html',
-                               pending_documents=pending_documents,
-                               signed_documents=signed_documents)
+        template_dir = 'boss'
+        sections = {
+            'pending': (dashboard_list_query(Document.status == 'pending'), Document.upload_date),
+            'signed': (dashboard_list_query(Document.status == 'signed', Document.signed_by == current_user.id),
+                       Document.signed_date),
+        }
     else:
         # Employees see their own documents
-        pending_documents = Document.query.filter_by(uploaded_by=current_user.id, status='pending').all()
-        signed_documents = Document.query.filter_by(uploaded_by=current_user.id, status='signed').all()
-        return render_template('employee/dashboard.html', 
-                             pending_documents=pending_documents,
-                             signed_documents=signed_documents)
+        template_dir = 'employee'
+        sections = {
+            'pending': (dashboard_list_query(Document.status == 'pending', Document.uploaded_by == current_user.id),
+                        Document.upload_date),
+            'signed': (dashboard_list_query(Document.status == 'signed', Document.uploaded_by == current_user.id),
+                       Document.signed_date),
+        }
+    per_page = current_app.config['DASHBOARD_PAGE_SIZE']
+
+    # "Load more" asks for the next page of one table
+    section = request.args.get('section')
+    if request.args.get('ajax') and section in sections:
+        query, sort_column = sections[section]
+        try:
+            with timed('dashboard', f'{section}_query'):
+                documents, next_cursor = keyset_page(query, sort_column, Document.id, request.args.get('cursor'),
+                                                     per_page)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        with timed('dashboard', 'render'):
+            html = render_template(f'{template_dir}/_{section}_rows.html', documents=documents)
+        return jsonify({'success': True, 'html': html, 'next_cursor': next_cursor})
+
+    # Taken first: a change made while the tables are queried is replayed by the feed, never missed
+    changes_cursor = latest_event_id()
+    with timed('dashboard', 'pending_query'):
+        pending_documents, pending_cursor = keyset_page(*sections['pending'], Document.id, per_page=per_page)
+    with timed('dashboard', 'signed_query'):
+        signed_documents, signed_cursor = keyset_page(*sections['signed'], Document.id, per_page=per_page)
+    with timed('dashboard', 'render'):
+        return render_template(f'{template_dir}/dashboard.html',
+                               pending_documents=pending_documents,
+                               signed_documents=signed_documents,
+                               pending_cursor=pending_cursor,
+                               signed_cursor=signed_cursor,
+                               changes_cursor=changes_cursor)
+
+
+@documents_bp.route('/dashboard/changes')
+@login_required
+def dashboard_changes():
+    """Long poll for the dashboard: rows changed after event `since`, rendered for the tables.
+
+    Waits up to CHANGE_FEED_TIMEOUT seconds for a change. Each change says which
+    table the document's row now belongs in, if any; the client removes the old
+    row and inserts the new one.
+    """
+    try:
+        since = int(request.args['since'])
+    except (KeyError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+    if is_expired(since):
+        # Events the dashboard has not seen were pruned, only a reload catches up
+        return jsonify({'success': True, 'reset': True})
+
+    is_boss = current_user.is_boss()
+    events = wait_for_events(since, None if is_boss else current_user.id, current_app.config['CHANGE_FEED_TIMEOUT'])
+    if not events:
+        return jsonify({'success': True, 'changes': [], 'cursor': since})
+
+    # Only the current state of each document matters, in the order they last changed
+    kinds = {}
+    for event in events:
+        kinds.pop(event.document_id, None)
+        kinds[event.document_id] = event.kind
+    documents = {doc.id: doc for doc in dashboard_list_query(Document.id.in_(kinds))}
+    template_dir = 'boss' if is_boss else 'employee'
+    changes = []
+    with timed('dashboard', 'render'):
+        for document_id, kind in kinds.items():
+            document = documents.get(document_id)
+            section = dashboard_section(document, current_user)
+            html = render_template(f'{template_dir}/_{section}_rows.html', documents=[document]) if section else None
+            changes.append({'document_id': document_id, 'kind': kind, 'section': section, 'html': html})
+    return jsonify({'success': True, 'changes': changes, 'cursor': events[-1].id})
+
+
+@documents_bp.route('/search')
+@login_required
+def search_documents():
+    """Full-text search over the documents the user can see, best match first, a page of rendered rows at a time"""
+    query_text = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    if not query_text or page < 1:
+        return jsonify({'success': False, 'message': 'Enter something to search for'}), 400
+
+    per_page = current_app.config['DASHBOARD_PAGE_SIZE']
+    with timed('search', 'query'):
+        matches, has_more = search(query_text, None if current_user.is_boss() else current_user.id, page, per_page)
+        documents = {doc.id: doc for doc in dashboard_list_query(Document.id.in_([doc_id for doc_id, _ in matches]))}
+    with timed('search', 'render'):
+        html = render_template('shared/_search_rows.html',
+                               results=[(documents[doc_id], snippet) for doc_id, snippet in matches
+                                        if doc_id in documents])
+    return jsonify({'success': True, 'html': html, 'next_page': page + 1 if has_more else None})
+
+
+DETAIL_FIELDS = ('client', 'work', 'document_type', 'comment')
+
+
+def create_uploaded_document(ingested, original_filename, ext, details=None):
+    """Record an ingested upload for the current user and notify the boss of employee uploads"""
+    try:
+        new_doc = Document(
+            filename=os.path.basename(ingested.path),
+            original_filename=original_filename,
+            file_path=ingested.path,
+            file_type=ext,
+            content_hash=ingested.content_hash,
+            file_size=ingested.size,
+            page_count=ingested.page_count,
+            uploaded_by=current_user.id,
+            status='pending',
+            **(details or {})
+        )
+        db.session.add(new_doc)
+        record_event(new_doc, 'uploaded')
+        with timed('upload', 'db_commit'):
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        abandon(ingested.path)
+        raise
+    settle(ingested.path)
+    record_values(details or {}, current_user.id)
+    if ext == 'pdf':
+        try:
+            schedule_page_geometry(new_doc.file_path)
+        except Exception as e:
+            current_app.logger.error(f'Failed to schedule page measurement: {str(e)}')
+        try:
+            schedule_prerender(new_doc.file_path, new_doc.content_hash)
+        except Exception as e:
+            current_app.logger.error(f'Failed to schedule page previews: {str(e)}')
+        try:
+            schedule_text_extraction(new_doc.file_path)
+        except Exception as e:
+            current_app.logger.error(f'Failed to schedule text extraction: {str(e)}')
+    else:
+        # Converted now so neither the viewer nor signing waits on it later
+        try:
+            schedule_conversion(new_doc)
+        except Exception as e:
+            current_app.logger.error(f'Failed to schedule PDF conversion: {str(e)}')
+    if not current_user.is_boss():
+        # Queue a notification to the boss
+        boss = get_boss()
+        if boss:
+            try:
+                doc_data = {
+                    'id': new_doc.id,
+                    'original_filename': new_doc.original_filename,
+                    'client': new_doc.client,
+                    'work': new_doc.work,
+                    'document_type': new_doc.document_type,
+                    'comment': new_doc.comment
+                }
+                with timed('upload', 'email_enqueue'):
+                    send_document_notification(boss.email, doc_data)
+            except Exception as e:
+                current_app.logger.error(f'Failed to send notification: {str(e)}')
+    return new_doc
 
 
 @documents_bp.route('/upload', methods=['GET', 'POST'])
@@ -56,54 +245,26 @@ def upload_document():
         return redirect(url_for('documents.dashboard'))
 
     if request.method == 'POST':
-        file = request.files.get('document')
-        if not file or file.filename == '':
-            flash('No selected file')
+        try:
+            # Hashed and checked while it streams in; identical uploads share one stored file
+            with form_upload(current_app.config['MAX_DOCUMENT_SIZE']) as (form, files):
+                file = files.get('document')
+                if not file or file.filename == '':
+                    flash('No selected file')
+                    return redirect(request.url)
+                if not allowed_file(file.filename):
+                    return render_template('employee/document_upload.html')
+                original_filename = secure_filename(file.filename)
+                ext = original_filename.rsplit('.', 1)[1].lower()
+                ingested = finish_upload(file)
+                # Get extra details from form
+                details = {field: form.get(field) for field in DETAIL_FIELDS}
+        except IngestError as e:
+            flash(str(e))
             return redirect(request.url)
-        if allowed_file(file.filename):
-            original_filename = secure_filename(file.filename)
-            ext = original_filename.rsplit('.', 1)[1].lower()
-            filename = f"{uuid.uuid4().hex}.{ext}"
-            save_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'documents')
-            os.makedirs(save_dir, exist_ok=True)
-            file_path = os.path.join(save_dir, filename)
-            file.save(file_path)
-            # Get extra details from form
-            client = request.form.get('client')
-            work = request.form.get('work')
-            document_type = request.form.get('document_type')
-            comment = request.form.get('comment')
-            new_doc = Document(
-                filename=filename,
-                original_filename=original_filename,
-                file_path=file_path,
-                file_type=ext,
-                uploaded_by=current_user.id,
-                status='pending',
-                client=client,
-                work=work,
-                document_type=document_type,
-                comment=comment
-            )
-            db.session.add(new_doc)
-            db.session.commit()
-            # Send notification to boss asynchronously
-            boss = User.query.filter_by(role='boss').first()
-            if boss:
-                try:
-                    doc_data = {
-                        'id': new_doc.id,
-                        'original_filename': new_doc.original_filename,
-                        'client': new_doc.client,
-                        'work': new_doc.work,
-                        'document_type': new_doc.document_type,
-                        'comment': new_doc.comment
-                    }
-                    async_send_document_notification(boss.email, doc_data)
-                except Exception as e:
-                    current_app.logger.error(f'Failed to send notification: {str(e)}')
-            flash('Document uploaded successfully')
-            return redirect(url_for('documents.dashboard'))
+        create_uploaded_document(ingested, original_filename, ext, details)
+        flash('Document uploaded successfully')
+        return redirect(url_for('documents.dashboard'))
     return render_template('employee/document_upload.html')
 
 
@@ -115,34 +276,112 @@ def upload_for_sign():
         flash('Only boss can upload documents for signing')
         return redirect(url_for('documents.dashboard'))
 
-    file = request.files.get('document')
-    if not file or file.filename == '':
-        flash('No selected file')
+    try:
+        with form_upload(current_app.config['MAX_DOCUMENT_SIZE']) as (form, files):
+            file = files.get('document')
+            if not file or file.filename == '':
+                flash('No selected file')
+                return redirect(url_for('documents.dashboard'))
+            if not allowed_file(file.filename):
+                flash('File type not allowed')
+                return redirect(url_for('documents.dashboard'))
+            original_filename = secure_filename(file.filename)
+            ext = original_filename.rsplit('.', 1)[1].lower()
+            ingested = finish_upload(file)
+    except IngestError as e:
+        flash(str(e))
         return redirect(url_for('documents.dashboard'))
-    if allowed_file(file.filename):
-        original_filename = secure_filename(file.filename)
-        ext = original_filename.rsplit('.', 1)[1].lower()
-        filename = f"{uuid.uuid4().hex}.{ext}"
-        save_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'documents')
-        os.makedirs(save_dir, exist_ok=True)
-        file_path = os.path.join(save_dir, filename)
-        file.save(file_path)
-        new_doc = Document(
-            filename=filename,
-            original_filename=original_filename,
-            file_path=file_path,
-            file_type=ext,
-            uploaded_by=current_user.id,
-            status='pending'
-        )
-        db.session.add(new_doc)
-        db.session.commit()
-        flash('Document uploaded for your signature')
-    else:
-        flash('File type not allowed')
+    create_uploaded_document(ingested, original_filename, ext)
+    flash('Document uploaded for your signature')
     return redirect(url_for('documents.dashboard'))
 
 
+def _own_upload_session(upload_id):
+    meta = get_upload_session(upload_id)
+    if not meta or meta['user_id'] != current_user.id:
+        return None
+    return meta
+
+
+def _upload_session_json(meta):
+    return {
+        'success': True,
+        'upload_id': meta['id'],
+        'offset': meta['offset'],
+        'size': meta['size'],
+        'chunk_size': current_app.config['UPLOAD_CHUNK_SIZE'],
+        'upload_url': url_for('documents.upload_chunk', upload_id=meta['id'])
+    }
+
+
+@documents_bp.route('/uploads', methods=['POST'])
+@login_required
+def start_upload():
+    """Open a resumable upload: JSON with filename, size and the form details"""
+    data = request.get_json(silent=True) or {}
+    original_filename = secure_filename(data.get('filename') or '')
+    size = data.get('size')
+    if not original_filename or not allowed_file(original_filename):
+        return jsonify({'success': False, 'message': 'File type not allowed'}), 400
+    if not isinstance(size, int) or size <= 0:
+        return jsonify({'success': False, 'message': 'File size is required'}), 400
+    if size > current_app.config['MAX_DOCUMENT_SIZE']:
+        return jsonify({'success': False, 'message': 'File is too large'}), 413
+
+    ext = original_filename.rsplit('.', 1)[1].lower()
+    details = {} if current_user.is_boss() else {field: data.get(field) for field in DETAIL_FIELDS}
+    meta = start_upload_session(current_user.id, original_filename, ext, size, details)
+    return jsonify(_upload_session_json(meta)), 201
+
+
+@documents_bp.route('/uploads/<upload_id>', methods=['GET', 'PATCH', 'DELETE'])
+@login_required
+def upload_chunk(upload_id):
+    """GET reports the offset to resume from, PATCH appends a chunk at Upload-Offset, DELETE cancels"""
+    meta = _own_upload_session(upload_id)
+    if not meta:
+        return jsonify({'success': False, 'message': 'Upload not found'}), 404
+
+    if request.method == 'GET':
+        return jsonify(_upload_session_json(meta))
+    if request.method == 'DELETE':
+        abort_upload_session(meta)
+        return jsonify({'success': True, 'message': 'Upload cancelled'})
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Upload-Offset header is required'}), 400
+    request.max_content_length = current_app.config['UPLOAD_CHUNK_SIZE']
+    try:
+        new_offset = append_upload_chunk(meta, offset, request.stream)
+    except IngestError as e:
+        abort_upload_session(meta)
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except ValueError as e:
+        current = get_upload_session(upload_id)
+        return jsonify({'success': False, 'message': str(e), 'offset': current['offset'] if current else 0}), 409
+    return jsonify({'success': True, 'offset': new_offset})
+
+
+@documents_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+@login_required
+def complete_upload(upload_id):
+    meta = _own_upload_session(upload_id)
+    if not meta:
+        return jsonify({'success': False, 'message': 'Upload not found'}), 404
+    try:
+        ingested = complete_upload_session(meta)
+    except IngestError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+
+    new_doc = create_uploaded_document(ingested, meta['original_filename'], meta['ext'], meta['fields'])
+    flash('Document uploaded for your signature' if current_user.is_boss() else 'Document uploaded successfully')
+    return jsonify({'success': True, 'document_id': new_doc.id, 'redirect': url_for('documents.dashboard')})
+
+
 @documents_bp.route('/document/<int:document_id>')
 @login_required
 def view_document(document_id):
@@ -162,8 +401,13 @@ def download_document(document_id):
     if not current_user.is_boss() and document.uploaded_by != current_user.id:
         flash('You do not have permission to download this document')
         return redirect(url_for('documents.dashboard'))
-    file_path = document.signed_file_path if document.status == 'signed' else document.file_path
-    return send_file(file_path, as_attachment=True, download_name=document.original_filename)
+    signed = document.status == 'signed'
+    file_path = document.signed_file_path if signed else document.file_path
+    download_name = document.original_filename
+    if signed and document.file_type != 'pdf':
+        download_name = os.path.splitext(download_name)[0] + '.pdf'  # Word files are signed as their PDF
+    return send_document(file_path, document_etag(document, signed), document.status,
+                         as_attachment=True, download_name=download_name)
 
 
 @documents_bp.route('/view-signed/<int:document_id>')
@@ -176,7 +420,95 @@ def view_signed(document_id):
     if not doc.signed_file_path or not os.path.exists(doc.signed_file_path):
         flash('Signed file not found')
         return redirect(url_for('documents.dashboard'))
-    return send_file(doc.signed_file_path, mimetype='application/pdf', as_attachment=False)
+    return send_document(doc.signed_file_path, document_etag(doc, True), doc.status, mimetype='application/pdf')
+
+
+@documents_bp.route('/view-original/<int:document_id>')
+@login_required
+def view_original(document_id):
+    doc = Document.query.get_or_404(document_id)
+    if not current_user.is_boss() and doc.uploaded_by != current_user.id:
+        flash('You do not have permission to view this document')
+        return redirect(url_for('documents.dashboard'))
+    if not doc.file_path or not os.path.exists(doc.file_path):
+        flash('File not found')
+        return redirect(url_for('documents.dashboard'))
+    return send_document(doc.file_path, document_etag(doc, False), doc.status)
+
+
+def preview_source(document):
+    """The PDF the viewer shows for a document and its content hash, or (None, None) while a Word file converts"""
+    if document.status == 'signed' and document.signed_file_path:
+        return document.signed_file_path, document_etag(document, True)
+    if document.file_type == 'pdf':
+        return document.file_path, document_etag(document, False)
+    return pdf_source(document), document.converted_content_hash
+
+
+def conversion_unavailable(document):
+    """Response for a Word document without its PDF yet. Restarts a conversion lost with a restart."""
+    if document.conversion_status == 'failed':
+        return jsonify({'success': False, 'message': 'The document could not be converted to PDF'}), 500
+    schedule_conversion(document)
+    return jsonify({'success': False, 'converting': True, 'message': 'The document is being converted to PDF'}), 409
+
+
+@documents_bp.route('/document/<int:document_id>/pages')
+@login_required
+def document_pages(document_id):
+    """Page sizes and preview image URLs for the viewer"""
+    document = Document.query.get_or_404(document_id)
+    if not current_user.is_boss() and document.uploaded_by != current_user.id:
+        return jsonify({'success': False, 'message': 'You do not have permission to view this document'}), 403
+    path, content_hash = preview_source(document)
+    if path is None:
+        return conversion_unavailable(document)
+    try:
+        # Signing keeps the page boxes, so a signed copy has the geometry of its source
+        geometry = get_page_geometry(document, pdf_source(document))
+    except Exception as e:
+        current_app.logger.error(f'Error reading pages of document {document_id}: {str(e)}')
+        return jsonify({'success': False, 'message': 'Could not read the document'}), 500
+
+    return jsonify({'success': True, 'pages': [
+        {
+            'width': page['width'],
+            'height': page['height'],
+            'url': url_for('documents.page_preview', document_id=document.id, page=i, v=content_hash[:16])
+        }
+        for i, page in enumerate(geometry)
+    ]})
+
+
+@documents_bp.route('/document/<int:document_id>/pages/<int:page>')
+@login_required
+def page_preview(document_id, page):
+    """One page as a JPEG, rendered on first request. ?zoom= is one of ZOOMS."""
+    document = Document.query.get_or_404(document_id)
+    if not current_user.is_boss() and document.uploaded_by != current_user.id:
+        return jsonify({'success': False, 'message': 'You do not have permission to view this document'}), 403
+    zoom_name = request.args.get('zoom', '1.5')
+    if zoom_name not in ZOOMS:
+        return jsonify({'success': False, 'message': f"zoom must be one of {', '.join(ZOOMS)}"}), 400
+    path, content_hash = preview_source(document)
+    if path is None:
+        return conversion_unavailable(document)
+    if not document.page_geometry:
+        get_page_geometry(document, pdf_source(document))  # Also sets the page count it was measured with
+    if page >= document.page_count:
+        return jsonify({'success': False, 'message': 'Page not found'}), 404
+    image_path = get_preview(path, content_hash, page, zoom_name)
+
+    response = send_file(image_path, mimetype='image/jpeg', conditional=True,
+                         etag=f'{content_hash}-{zoom_name}-{page}')
+    if request.args.get('v') == content_hash[:16]:
+        # The URL names this exact file version, so the image can never change under it
+        response.cache_control.private = True
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+        return response
+    return apply_cache_policy(response, document.status)
 
 
 @documents_bp.route('/save-signature-positions/<int:document_id>', methods=['POST'])
@@ -195,16 +527,22 @@ def save_signature_positions(document_id):
     if not data or 'positions' not in data:
         return jsonify({'success': False, 'message': 'Invalid position data'}), 400
 
+    source = pdf_source(document)
+    if source is None:
+        return jsonify({'success': False, 'message': 'The document has not been converted to PDF yet'}), 409
+
     try:
-        # Validate positions data
+        # Checked against the page geometry measured at upload, not the file
+        error = position_error(data['positions'], get_page_geometry(document, source))
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
         for pos in data['positions']:
             if 'type' not in pos:
                 pos['type'] = 'signature'  # Default to signature if type not specified
-            if 'page' not in pos or 'x' not in pos or 'y' not in pos:
-                return jsonify({'success': False, 'message': 'Invalid position format'}), 400
+            if pos['type'] not in PLACEMENT_TYPES:
+                return jsonify({'success': False, 'message': f"Unknown signature type {pos['type']!r}"}), 400
 
-        # Store JSON string of positions in the database
-        document.signature_placement = json.dumps(data['positions'])
+        replace_positions(document.id, data['positions'])
         db.session.commit()
         return jsonify({'success': True, 'message': 'Signature positions saved'})
     except Exception as e:
@@ -221,19 +559,7 @@ def get_signature_positions(document_id):
     if not current_user.is_boss() and document.uploaded_by != current_user.id:
         return jsonify({'success': False, 'message': 'You do not have permission to view this document'}), 403
 
-    if not document.signature_placement:
-        return jsonify({'success': True, 'positions': []})
-
-    try:
-        positions = json.loads(document.signature_placement)
-        # Ensure each position has a type field
-        for pos in positions:
-            if 'type' not in pos:
-                pos['type'] = 'signature'  # Default to signature if type not specified
-        return jsonify({'success': True, 'positions': positions})
-    except Exception as e:
-        current_app.logger.error(f"Error parsing signature positions: {str(e)}")
-        return jsonify({'success': False, 'message': f'Error parsing positions: {str(e)}'}), 500
+    return jsonify({'success': True, 'positions': get_positions(document.id)})
 
 
 @documents_bp.route('/delete-document/<int:document_id>', methods=['POST'])
@@ -246,15 +572,19 @@ def delete_document(document_id):
         return jsonify({'success': False, 'message': 'You do not have permission to delete this document'}), 403
 
     try:
-        # Delete the document files
-        if document.file_path and os.path.exists(document.file_path):
-            os.remove(document.file_path)
-        if document.signed_file_path and os.path.exists(document.signed_file_path):
-            os.remove(document.signed_file_path)
+        paths = (document.file_path, document.converted_file_path, document.signed_file_path)
+        details = {field: getattr(document, field) for field in DETAIL_FIELDS}
+        uploaded_by = document.uploaded_by
 
         # Delete from database
+        record_event(document, 'deleted')
         db.session.delete(document)
         db.session.commit()
+        record_values(details, uploaded_by, -1)
+
+        # Stored files can be shared with other documents, so only drop unreferenced ones
+        for path in paths:
+            release(path)
 
         return jsonify({'success': True, 'message': 'Document deleted successfully'})
     except Exception as e:
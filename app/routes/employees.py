@@ -1,10 +1,18 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import current_user, login_required
-from app.add_employee import add_employee
-from app.email_service import send_email
+import io
+from app.add_employee import add_employee, import_employees, read_employee_csv
+from app.email_service import queue_email
 
 employees_bp = Blueprint('employees', __name__)
 
+def send_temp_password_email(username, email, temp_password):
+    subject = 'Your E-Signature System Temporary Password'
+    with current_app.app_context():
+        login_link = url_for('auth.login', _external=True)
+    body = f"Hello {username},\n\nYou have been added to the E-Signature System. Your temporary password is: {temp_password}\n\nPlease log in and reset your password immediately.\n\nLogin here: {login_link}\n\nThank you."
+    return queue_email(subject, email, body)
+
 @employees_bp.route('/employee-manager')
 @login_required
 def employee_manager():
@@ -27,12 +35,8 @@ def add_employee_route():
     success, message, temp_password = add_employee(username, email)
     if success:
         # Send email to employee
-        subject = 'Your E-Signature System Temporary Password'
-        with current_app.app_context():
-            login_link = url_for('auth.login', _external=True)
-        body = f"Hello {username},\n\nYou have been added to the E-Signature System. Your temporary password is: {temp_password}\n\nPlease log in and reset your password immediately.\n\nLogin here: {login_link}\n\nThank you."
         try:
-            send_email(subject, email, body)
+            send_temp_password_email(username, email, temp_password)
             flash(f"{message} The temporary password was sent to {email}. The employee must reset it immediately after logging in.", 'success')
         except Exception as e:
             flash(f"{message} However, there was an error sending the email: {str(e)}", 'danger')
@@ -40,4 +44,32 @@ def add_employee_route():
         flash(message, 'danger')
     return redirect(url_for('employees.employee_manager'))
 
+@employees_bp.route('/import-employees', methods=['POST'])
+@login_required
+def import_employees_route():
+    if not current_user.is_boss():
+        flash('Only the boss can add employees.', 'danger')
+        return redirect(url_for('documents.dashboard'))
+    file = request.files.get('employees_csv')
+    if not file or file.filename == '':
+        flash('No CSV file selected.', 'danger')
+        return redirect(url_for('employees.employee_manager'))
+    try:
+        rows = read_employee_csv(io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline=''))
+        created, skipped = import_employees(rows)
+    except Exception as e:
+        current_app.logger.error(f'Error importing employees: {str(e)}')
+        flash(f'Error importing employees: {str(e)}', 'danger')
+        return redirect(url_for('employees.employee_manager'))
+
+    failed_emails = [email for username, email, temp_password in created
+                     if not send_temp_password_email(username, email, temp_password)]
+    if created:
+        flash(f"✅ {len(created)} employee(s) added. Each was emailed a temporary password and must reset it after logging in.", 'success')
+    if failed_emails:
+        flash(f"The temporary password email could not be sent to: {', '.join(failed_emails)}", 'danger')
+    for username, email, reason in skipped:
+        flash(f"Skipped {username or '?'} <{email or '?'}>: {reason}", 'danger')
+    return redirect(url_for('employees.employee_manager'))
+
 #testing
\ No newline at end of file
@@ -0,0 +1,35 @@
+import hmac
+
+from flask import Blueprint, Response, current_app, request
+from flask_login import current_user
+
+from app.instrumentation import Counter, render_metrics
+from app.utils.lookup_cache import cache_stats
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def lookup_cache_metrics():
+    hits = Counter('esign_lookup_cache_hits_total', 'Lookup cache hits', ('cache',))
+    misses = Counter('esign_lookup_cache_misses_total', 'Lookup cache misses', ('cache',))
+    for name, stats in cache_stats().items():
+        hits.inc((name,), stats['hits'])
+        misses.inc((name,), stats['misses'])
+    return [hits.render(), misses.render()]
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """Timings, request and SQL counts for this process, in the Prometheus text format.
+
+    Scrapers send the METRICS_TOKEN bearer token; without one configured, only a logged-in boss can look.
+    """
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    elif not current_user.is_authenticated:
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    elif not current_user.is_boss():
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    return Response(render_metrics(lookup_cache_metrics()), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,199 @@
+# app/search_index.py
+import re
+from concurrent.futures import as_completed
+
+from flask import current_app
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, event, or_, text
+
+from app import db
+from app.models import Document
+from app.page_previews import get_render_pool
+from app.utils.pdf_text import extract_text
+
+# Indexed document columns, in the order of the FTS5 columns before `body`
+FIELDS = ('original_filename', 'client', 'work', 'document_type', 'comment')
+# bm25() weight of each FTS5 column; a match in the filename counts most, one in the PDF text least
+WEIGHTS = (10.0, 4.0, 4.0, 4.0, 2.0, 1.0)
+MAX_TERMS = 10
+SNIPPET_TOKENS = 12
+_MARK_START, _MARK_END = '\x02', '\x03'  # Snippet highlight markers, turned into <mark> after escaping
+
+CREATE_INDEX = DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS document_search USING fts5("
+    "original_filename, client, work, document_type, comment, body, "
+    "tokenize = 'porter unicode61 remove_diacritics 2')"
+)
+
+# create_all() and drop_all() manage the index with the tables; migrations create it themselves
+event.listen(db.metadata, 'after_create', CREATE_INDEX.execute_if(dialect='sqlite'))
+event.listen(db.metadata, 'before_drop', DDL('DROP TABLE IF EXISTS document_search').execute_if(dialect='sqlite'))
+
+
+def is_available(connection=None):
+    """Full-text search needs SQLite's FTS5; other databases fall back to substring matching"""
+    dialect = connection.dialect if connection is not None else db.engine.dialect
+    return dialect.name == 'sqlite'
+
+
+def _field_params(document):
+    return {field: getattr(document, field) or '' for field in FIELDS}
+
+
+@event.listens_for(Document, 'after_insert')
+def _index_inserted(mapper, connection, document):
+    if is_available(connection):
+        connection.execute(text(
+            "INSERT INTO document_search (rowid, original_filename, client, work, document_type, comment, body) "
+            "VALUES (:id, :original_filename, :client, :work, :document_type, :comment, '')"
+        ), {'id': document.id, **_field_params(document)})
+
+
+@event.listens_for(Document, 'after_update')
+def _index_updated(mapper, connection, document):
+    state = db.inspect(document)
+    if is_available(connection) and any(state.attrs[field].history.has_changes() for field in FIELDS):
+        connection.execute(text(
+            "UPDATE document_search SET original_filename = :original_filename, client = :client, work = :work, "
+            "document_type = :document_type, comment = :comment WHERE rowid = :id"
+        ), {'id': document.id, **_field_params(document)})
+
+
+@event.listens_for(Document, 'after_delete')
+def _index_deleted(mapper, connection, document):
+    if is_available(connection):
+        connection.execute(text("DELETE FROM document_search WHERE rowid = :id"), {'id': document.id})
+
+
+def _set_body(pdf_path, body):
+    """Index `body` as the text of every document whose PDF is the stored file `pdf_path`"""
+    db.session.execute(text(
+        "UPDATE document_search SET body = :body WHERE rowid IN "
+        "(SELECT id FROM document WHERE file_path = :path OR converted_file_path = :path)"
+    ), {'body': body, 'path': pdf_path})
+
+
+def schedule_text_extraction(pdf_path):
+    """Index the text of a stored PDF for the documents using it, e.g. right after upload.
+
+    Stored files are shared by content, so text already extracted for another
+    document with the same file is copied instead of extracted again.
+    Otherwise the text is extracted in the page rendering pool.
+    """
+    if not is_available():
+        return
+    body = db.session.execute(text(
+        "SELECT document_search.body FROM document_search JOIN document ON document.id = document_search.rowid "
+        "WHERE (document.file_path = :path OR document.converted_file_path = :path) AND document_search.body != '' "
+        "LIMIT 1"
+    ), {'path': pdf_path}).scalar()
+    if body is not None:
+        _set_body(pdf_path, body)
+        db.session.commit()
+        return
+
+    app = current_app._get_current_object()
+    future = get_render_pool(app).submit(extract_text, pdf_path, app.config['SEARCH_TEXT_MAX_CHARS'])
+    future.add_done_callback(lambda f: _finish(app, pdf_path, f))
+
+
+def _finish(app, pdf_path, future):
+    if future.exception():
+        app.logger.error(f'Extracting the text of {pdf_path} failed: {future.exception()}')
+        return
+    with app.app_context():
+        try:
+            _set_body(pdf_path, future.result())
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f'Indexing the text of {pdf_path} failed: {str(e)}')
+
+
+def rebuild_index():
+    """Re-index every document's fields and extract the text of every stored PDF again.
+
+    For databases indexed before text extraction existed, or after restoring
+    files. Waits for the extraction; returns the number of PDFs whose text was indexed.
+    """
+    db.session.execute(text("DELETE FROM document_search"))
+    db.session.execute(text(
+        "INSERT INTO document_search (rowid, original_filename, client, work, document_type, comment, body) "
+        "SELECT id, coalesce(original_filename, ''), coalesce(client, ''), coalesce(work, ''), "
+        "coalesce(document_type, ''), coalesce(comment, ''), '' FROM document"
+    ))
+    db.session.commit()
+
+    pdf_paths = {path for path, in db.session.query(Document.file_path).filter(Document.file_type == 'pdf')}
+    pdf_paths |= {path for path, in db.session.query(Document.converted_file_path)
+                  .filter(Document.conversion_status == 'done')}
+    max_chars = current_app.config['SEARCH_TEXT_MAX_CHARS']
+    pool = get_render_pool(current_app)
+    futures = {pool.submit(extract_text, path, max_chars): path for path in pdf_paths}
+    indexed = 0
+    for future in as_completed(futures):
+        try:
+            _set_body(futures[future], future.result())
+            indexed += 1
+        except Exception as e:
+            current_app.logger.error(f'Extracting the text of {futures[future]} failed: {str(e)}')
+    db.session.commit()
+    return indexed
+
+
+def match_expression(query_text):
+    """An FTS5 query matching documents with every word of `query_text`, the last one as a prefix.
+
+    Words are quoted, so FTS5 operators and punctuation typed by the user
+    cannot make the query invalid. None if there are no words.
+    """
+    terms = re.findall(r'\w+', query_text)[:MAX_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"' for term in terms) + '*'
+
+
+def highlight(snippet):
+    """A snippet from the index as HTML, with matches in <mark>"""
+    return Markup(str(escape(snippet)).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>'))
+
+
+def search(query_text, uploaded_by=None, page=1, per_page=20):
+    """Documents matching `query_text`, best match first.
+
+    Restricted to documents uploaded by `uploaded_by` if given. Returns
+    ([(document id, highlighted snippet or None), ...], has_more) for one page.
+    """
+    offset = (page - 1) * per_page
+    if not is_available():
+        return _search_fields(query_text, uploaded_by, offset, per_page)
+
+    expression = match_expression(query_text)
+    if expression is None:
+        return [], False
+    rows = db.session.execute(text(
+        f"SELECT document_search.rowid, "
+        f"snippet(document_search, -1, :start, :end, '…', {SNIPPET_TOKENS}) "
+        f"FROM document_search JOIN document ON document.id = document_search.rowid "
+        f"WHERE document_search MATCH :expression "
+        f"AND (:uploaded_by IS NULL OR document.uploaded_by = :uploaded_by) "
+        f"ORDER BY bm25(document_search, {', '.join(str(w) for w in WEIGHTS)}), document_search.rowid DESC "
+        f"LIMIT :limit OFFSET :offset"
+    ), {'expression': expression, 'uploaded_by': uploaded_by, 'start': _MARK_START, 'end': _MARK_END,
+        'limit': per_page + 1, 'offset': offset}).all()
+    return [(document_id, highlight(snippet)) for document_id, snippet in rows[:per_page]], len(rows) > per_page
+
+
+def _search_fields(query_text, uploaded_by, offset, per_page):
+    """Substring match on the document fields, newest first, for databases without FTS5"""
+    terms = re.findall(r'\w+', query_text)[:MAX_TERMS]
+    if not terms:
+        return [], False
+    query = db.session.query(Document.id).filter(*(
+        or_(*(getattr(Document, field).ilike(f'%{term}%') for field in FIELDS)) for term in terms
+    ))
+    if uploaded_by is not None:
+        query = query.filter(Document.uploaded_by == uploaded_by)
+    ids = [document_id for document_id, in
+           query.order_by(Document.upload_date.desc(), Document.id.desc()).offset(offset).limit(per_page + 1)]
+    return [(document_id, None) for document_id in ids[:per_page]], len(ids) > per_page
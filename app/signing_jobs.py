@@ -0,0 +1,440 @@
+# app/signing_jobs.py
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+
+import pytz
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.change_feed import record_event
+from app.document_conversion import pdf_source
+from app.document_metadata import get_page_geometries, position_error
+from app.email_service import send_signature_completion_notification
+from app.instrumentation import capture_phases, observe_phases, timed
+from app.models import Document, SigningJob, User
+from app.page_previews import schedule_prerender
+from app.utils.blob_store import abandon, discard_temp, settle, store_file, temp_path
+from app.utils.pdf_stamping import sign_pdf_file
+from app.utils.signature_placements import positions_by_document
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+_executor = None
+_process_pool = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(app):
+    """The process-wide signing pool, created on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # A thread per stamping process, and one more so a bulk run doesn't hold up single documents
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config['SIGNING_WORKERS'] or stamping_processes(app) + 1,
+                thread_name_prefix='signing'
+            )
+        return _executor
+
+
+def stamping_processes(app):
+    return app.config['BULK_SIGNING_PROCESSES'] or os.cpu_count() or 1
+
+
+def get_process_pool(app):
+    """The process-wide pool that stamps PDFs for every signing job, created on first use.
+
+    PyMuPDF is not thread-safe, so stamping never runs on the job threads.
+    Workers are spawned rather than forked: forking a server that already
+    runs threads can copy a lock some other thread was holding.
+    """
+    global _process_pool
+    with _executor_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=stamping_processes(app),
+                                                mp_context=get_context('spawn'))
+        return _process_pool
+
+
+def signature_paths_for(signatures):
+    """Map signature id (as a string) to the image file on disk"""
+    return {str(sig.id): os.path.join(current_app.static_folder, sig.signature_path) for sig in signatures}
+
+
+def new_signed_path():
+    """Scratch path for a stamped PDF; store_file() moves it to its blob location"""
+    return temp_path('.pdf')
+
+
+def apply_signature_to_pdf(pdf_path, boss_signatures, positions):
+    """Stamp a PDF in the signing process pool and put the result in the blob store. Returns (path, content_hash)
+
+    The caller settles the stored path once the document row is written (see blob_store.commit_temp).
+    """
+    app = current_app._get_current_object()
+    out_path = new_signed_path()
+    try:
+        # Signature images are decoded lazily, and only for the ids the positions use
+        future = get_process_pool(app).submit(sign_pdf_file_timed, pdf_path, out_path, positions,
+                                              signature_paths_for(boss_signatures), app.config['PDF_BACKEND'],
+                                              app.config['SIGNING_INCREMENTAL'])
+        out_path, phases = future.result()
+        observe_phases(phases)
+        with timed('signing', 'store'):
+            return store_file(out_path)
+    except BaseException:
+        discard_temp(out_path)
+        raise
+
+
+def sign_pdf_file_timed(*args):
+    """sign_pdf_file for a worker process, returning (out_path, phases) so its timings reach this process"""
+    with capture_phases() as phases:
+        out_path = sign_pdf_file(*args)
+    return out_path, phases
+
+
+def auto_positions(positions, signature_id, initial_id, company_id):
+    """Positions saved by the employee (see signature_placements), each given the signature ID for its type"""
+    for pos in positions:
+        # Get the appropriate signature ID based on type
+        if pos['type'] == 'initial':
+            pos['signatureId'] = initial_id
+        elif pos['type'] == 'company':
+            pos['signatureId'] = company_id
+        else:
+            pos['signatureId'] = signature_id
+    return positions
+
+
+def expire_stale_jobs():
+    """Fail queued or running jobs whose last attempt started more than SIGNING_JOB_TIMEOUT seconds ago.
+
+    Jobs live in this process's thread pool and retry timers, so a restart or
+    crash leaves their rows active. Until they are failed they block their
+    document from being signed again.
+    """
+    now = datetime.now(pytz.utc)
+    cutoff = now - timedelta(seconds=current_app.config['SIGNING_JOB_TIMEOUT'])
+    expired = SigningJob.query.filter(
+        SigningJob.status.in_(ACTIVE_STATUSES),
+        func.coalesce(SigningJob.started_date, SigningJob.created_date) < cutoff
+    ).update({'status': 'failed', 'error': 'Abandoned: the signing worker stopped before finishing',
+              'finished_date': now}, synchronize_session=False)
+    if expired:
+        db.session.commit()
+        current_app.logger.warning(f'Failed {expired} signing job(s) left queued or running')
+
+
+def active_job_for(document_id):
+    """The queued or running job for a document, if there is one that is not stale"""
+    expire_stale_jobs()
+    return SigningJob.query.filter(
+        SigningJob.document_id == document_id,
+        SigningJob.status.in_(ACTIVE_STATUSES)
+    ).order_by(SigningJob.id.desc()).first()
+
+
+def enqueue_signing_job(document, user, positions, signing_method):
+    """Record a signing job and hand it to the worker pool.
+
+    Returns the job, or the document's active job if another request queued
+    one first.
+    """
+    job = SigningJob(
+        document_id=document.id,
+        requested_by=user.id,
+        status='queued',
+        signing_method=signing_method,
+        positions=json.dumps(positions),
+        attempts=0
+    )
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # uq_signing_job_active_document: the check before this call raced with another request
+        db.session.rollback()
+        existing = active_job_for(document.id)
+        if existing is None:
+            raise
+        return existing
+
+    _submit(current_app._get_current_object(), job.id)
+    return job
+
+
+def _submit(app, job_id, delay=0):
+    if delay:
+        timer = threading.Timer(delay, _submit, args=(app, job_id))
+        timer.daemon = True
+        timer.start()
+        return
+    get_executor(app).submit(run_signing_job, app, job_id)
+
+
+def run_signing_job(app, job_id):
+    """Worker entry point: stamp the PDF and mark the document signed"""
+    with app.app_context():
+        job = db.session.get(SigningJob, job_id)
+        if not job or job.status not in ACTIVE_STATUSES:
+            return
+
+        job.status = 'running'
+        job.attempts = (job.attempts or 0) + 1
+        job.started_date = datetime.now(pytz.utc)
+        db.session.commit()
+
+        document = db.session.get(Document, job.document_id)
+        signer = db.session.get(User, job.requested_by)
+        if not document or not signer or document.status != 'pending':
+            # Nothing a retry could fix
+            _finish(job, 'failed', 'Document is no longer pending signature')
+            app.logger.error(f"Signing job {job_id} failed: document {job.document_id} is no longer pending")
+            return
+
+        stored = None
+        try:
+            positions = json.loads(job.positions)
+            source = pdf_source(document)
+            if source is None:
+                raise ValueError('Document has not been converted to PDF yet')
+            signed_file_path, signed_hash = apply_signature_to_pdf(source, signer.signatures, positions)
+            stored = signed_file_path
+
+            if not _mark_signed(job, document, signed_file_path, signed_hash):
+                db.session.rollback()
+                stored = None
+                abandon(signed_file_path)
+                _finish(job, 'failed', 'Document is no longer pending signature')
+                app.logger.error(f"Signing job {job_id} failed: document {document.id} was signed by another request")
+                return
+            with timed('signing', 'db_commit'):
+                _finish(job, 'succeeded')
+            stored = None
+            settle(signed_file_path)
+            app.logger.info(f"Signing job {job_id}: document {document.id} signed: {signed_file_path}")
+        except Exception as e:
+            db.session.rollback()
+            if stored:
+                abandon(stored)
+            _retry_or_fail(app, job_id, e)
+            return
+
+        _after_signing(app, document)
+
+
+def run_bulk_signing(app, job_ids):
+    """Worker entry point for bulk signing: stamp every document at once and record the results with one commit.
+
+    The PDFs are stamped side by side in the process pool, as many at a time as
+    it has workers. Jobs that fail are retried one by one like any other job.
+    """
+    with app.app_context():
+        jobs = SigningJob.query.filter(SigningJob.id.in_(job_ids), SigningJob.status.in_(ACTIVE_STATUSES)).all()
+        if not jobs:
+            return
+        started = datetime.now(pytz.utc)
+        for job in jobs:
+            job.status = 'running'
+            job.attempts = (job.attempts or 0) + 1
+            job.started_date = started
+        db.session.commit()
+
+        documents = {document.id: document for document in
+                     Document.query.filter(Document.id.in_([job.document_id for job in jobs]))}
+        signature_paths = {}
+        pool = get_process_pool(app)
+        futures, retry = {}, []
+        for job in jobs:
+            document = documents.get(job.document_id)
+            if job.requested_by not in signature_paths:
+                signer = db.session.get(User, job.requested_by)
+                signature_paths[job.requested_by] = signature_paths_for(signer.signatures) if signer else None
+            if not document or document.status != 'pending' or signature_paths[job.requested_by] is None:
+                _close(job, 'failed', 'Document is no longer pending signature')
+                continue
+            source = pdf_source(document)
+            if source is None:
+                retry.append((job.id, ValueError('Document has not been converted to PDF yet')))
+                continue
+            out_path = new_signed_path()
+            future = pool.submit(sign_pdf_file_timed, source, out_path, json.loads(job.positions),
+                                 signature_paths[job.requested_by], app.config['PDF_BACKEND'],
+                                 app.config['SIGNING_INCREMENTAL'])
+            futures[future] = job, document, out_path
+
+        stamped = []
+        for future in as_completed(futures):
+            job, document, out_path = futures[future]
+            try:
+                out_path, phases = future.result()
+                observe_phases(phases)
+                with timed('signing', 'store'):
+                    stamped.append((job, document, *store_file(out_path)))
+            except Exception as e:
+                discard_temp(out_path)
+                retry.append((job.id, e))
+
+        signed, kept, lost = [], [], []
+        try:
+            for job, document, signed_file_path, signed_hash in stamped:
+                if _mark_signed(job, document, signed_file_path, signed_hash):
+                    _close(job, 'succeeded')
+                    signed.append(document)
+                    kept.append(signed_file_path)
+                else:
+                    _close(job, 'failed', 'Document is no longer pending signature')
+                    lost.append(signed_file_path)
+            with timed('signing', 'db_commit'):
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            retry.extend((job.id, e) for job, *_ in stamped)
+            signed, kept, lost = [], [], [signed_file_path for _, _, signed_file_path, _ in stamped]
+        for signed_file_path in kept:
+            settle(signed_file_path)
+        for signed_file_path in lost:
+            abandon(signed_file_path)
+        app.logger.info(f"Bulk signing: {len(signed)} of {len(jobs)} documents signed, {len(retry)} to retry")
+
+        for job_id, error in retry:
+            _retry_or_fail(app, job_id, error)
+        for document in signed:
+            _after_signing(app, document)
+
+
+def _mark_signed(job, document, signed_file_path, signed_hash):
+    """Record a stamped copy on a document without committing. False if it stopped being pending meanwhile."""
+    # Only a document still pending is signed, in case another signing won the race while this one stamped
+    updated = Document.query.filter(Document.id == document.id, Document.status == 'pending').update({
+        'status': 'signed',
+        'signing_method': job.signing_method,
+        'signed_file_path': signed_file_path,
+        'signed_content_hash': signed_hash,
+        'signed_date': datetime.now(pytz.utc),
+        'signed_by': job.requested_by,
+    }, synchronize_session='fetch')
+    if updated:
+        record_event(document, 'signed')
+    return bool(updated)
+
+
+def _after_signing(app, document):
+    """Page previews and the uploader's email for a document that was just signed"""
+    try:
+        schedule_prerender(document.signed_file_path, document.signed_content_hash)
+    except Exception as e:
+        app.logger.error(f'Failed to schedule page previews: {str(e)}')
+
+    if document.uploader:
+        try:
+            with timed('signing', 'email_enqueue'):
+                send_signature_completion_notification(
+                    document.uploader.email,
+                    document.original_filename,
+                    document.id
+                )
+        except Exception as e:
+            app.logger.error(f'Failed to send completion notification: {str(e)}')
+
+
+def _close(job, status, error=None):
+    job.status = status
+    job.error = error
+    job.finished_date = datetime.now(pytz.utc)
+
+
+def _finish(job, status, error=None):
+    _close(job, status, error)
+    db.session.commit()
+
+
+def _retry_or_fail(app, job_id, error):
+    job = db.session.get(SigningJob, job_id)
+    if not job:
+        return
+    if job.attempts < app.config['SIGNING_MAX_ATTEMPTS']:
+        # Back off 2s, 4s, 8s, ... before trying again
+        delay = app.config['SIGNING_RETRY_BACKOFF'] * (2 ** (job.attempts - 1))
+        job.status = 'queued'
+        job.error = str(error)
+        db.session.commit()
+        app.logger.warning(f"Signing job {job_id} attempt {job.attempts} failed, retrying in {delay}s: {error}")
+        _submit(app, job_id, delay)
+    else:
+        _finish(job, 'failed', str(error))
+        app.logger.error(f"Signing job {job_id} failed after {job.attempts} attempt(s): {error}")
+
+
+def job_to_dict(job):
+    return {
+        'id': job.id,
+        'document_id': job.document_id,
+        'status': job.status,
+        'attempts': job.attempts,
+        'error': job.error,
+        'created_date': job.created_date.strftime('%Y-%m-%d %H:%M:%S') if job.created_date else None,
+        'finished_date': job.finished_date.strftime('%Y-%m-%d %H:%M:%S') if job.finished_date else None,
+    }
+
+
+def bulk_sign_documents(documents, signer, signature_ids):
+    """Queue signing jobs for documents, placing signatures where the employee saved them.
+
+    `signature_ids` maps 'signature', 'initial' and 'company' to the signature to
+    use for each type. Documents that cannot be signed as they are fail here.
+    The jobs for the rest are inserted with one commit and run together (see
+    run_bulk_signing). Returns a list of per-document result dicts.
+    """
+    signature_paths = signature_paths_for(signer.signatures)
+    saved_positions = positions_by_document(document.id for document in documents)
+    sources = {document.id: pdf_source(document) for document in documents}
+    geometries = get_page_geometries((document, sources[document.id]) for document in documents
+                                     if sources[document.id] is not None)
+
+    results, queued = [], []
+    for document in documents:
+        try:
+            positions = auto_positions(saved_positions.get(document.id, []), signature_ids.get('signature'),
+                                       signature_ids.get('initial'), signature_ids.get('company'))
+            missing = {pos['type'] for pos in positions if str(pos['signatureId']) not in signature_paths}
+            if missing:
+                raise ValueError(f"No default signature for: {', '.join(sorted(missing))}")
+            if sources[document.id] is None:
+                raise ValueError('Document has not been converted to PDF yet')
+            if document.id not in geometries:
+                raise ValueError('The pages of the document could not be read')
+            error = position_error(positions, geometries[document.id])
+            if error:
+                raise ValueError(error)
+        except Exception as e:
+            results.append({'document_id': document.id, 'success': False, 'message': str(e)})
+            continue
+        queued.append((document, positions))
+
+    jobs = [SigningJob(document_id=document.id, requested_by=signer.id, status='queued', signing_method='auto',
+                       positions=json.dumps(positions), attempts=0) for document, positions in queued]
+    if jobs:
+        db.session.add_all(jobs)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another request queued one of them since they were picked: queue them one at a time instead
+            db.session.rollback()
+            jobs = [enqueue_signing_job(document, signer, positions, 'auto') for document, positions in queued]
+        else:
+            get_executor(current_app).submit(run_bulk_signing, current_app._get_current_object(),
+                                             [job.id for job in jobs])
+    for job in jobs:
+        results.append({'document_id': job.document_id, 'success': True, 'message': 'Queued for signing',
+                        'job_id': job.id})
+
+    current_app.logger.info(f"Bulk signing: {len(jobs)} of {len(results)} documents queued")
+    return sorted(results, key=lambda r: r['document_id'])
@@ -0,0 +1,36 @@
+// Suggest client, work and document type values used on earlier uploads
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('input[data-autocomplete-url]').forEach(input => {
+        const suggestions = document.createElement('datalist');
+        suggestions.id = `${input.id}-suggestions`;
+        input.after(suggestions);
+        input.setAttribute('list', suggestions.id);
+
+        let timer;
+        let latestRequest = 0;
+        input.addEventListener('input', function() {
+            clearTimeout(timer);
+            const query = input.value.trim();
+            if (!query) {
+                suggestions.replaceChildren();
+                return;
+            }
+            timer = setTimeout(() => {
+                const request = ++latestRequest;
+                fetch(`${input.dataset.autocompleteUrl}?${new URLSearchParams({q: query})}`)
+                    .then(response => response.json())
+                    .then(data => {
+                        if (request !== latestRequest || !data.success) {
+                            return;  // The user kept typing
+                        }
+                        suggestions.replaceChildren(...data.suggestions.map(suggestion => {
+                            const option = document.createElement('option');
+                            option.value = suggestion.value;
+                            return option;
+                        }));
+                    })
+                    .catch(error => console.error('Error loading suggestions:', error));
+            }, 100);
+        });
+    });
+});
@@ -0,0 +1,110 @@
+// Resumable chunked uploads for the document upload forms.
+// Files that fit in one chunk go through the normal form post. Larger ones are
+// sent in data-chunk-size pieces, and an interrupted upload (network drop, page
+// reload) carries on from the last chunk the server stored.
+(function() {
+    const MAX_RETRIES = 5;
+
+    function storageKey(file) {
+        return `upload:${file.name}:${file.size}:${file.lastModified}`;
+    }
+
+    function requestError(data, response) {
+        const error = new Error((data && data.message) || `Upload failed (${response.status})`);
+        // Client errors won't go away by retrying
+        error.fatal = response.status >= 400 && response.status < 500 && response.status !== 409;
+        return error;
+    }
+
+    async function getSession(form, file) {
+        const savedUrl = localStorage.getItem(storageKey(file));
+        if (savedUrl) {
+            const saved = await fetch(savedUrl).then(r => r.ok ? r.json() : null).catch(() => null);
+            if (saved && saved.success) return saved;
+            localStorage.removeItem(storageKey(file));
+        }
+
+        const details = {};
+        new FormData(form).forEach((value, key) => {
+            if (key !== 'document') details[key] = value;
+        });
+        const response = await fetch(form.dataset.chunkedUpload, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(Object.assign(details, {filename: file.name, size: file.size}))
+        });
+        const data = await response.json();
+        if (!data.success) throw requestError(data, response);
+        localStorage.setItem(storageKey(file), data.upload_url);
+        return data;
+    }
+
+    async function sendChunks(session, file, onProgress) {
+        let offset = session.offset;
+        let failures = 0;
+        onProgress(offset / file.size);
+        while (offset < file.size) {
+            try {
+                const response = await fetch(session.upload_url, {
+                    method: 'PATCH',
+                    headers: {'Upload-Offset': String(offset), 'Content-Type': 'application/octet-stream'},
+                    body: file.slice(offset, offset + session.chunk_size)
+                });
+                const data = await response.json();
+                if (response.status === 409 && data.offset !== undefined) {
+                    offset = data.offset;  // The server has a different idea of where we are
+                    continue;
+                }
+                if (!data.success) throw requestError(data, response);
+                offset = data.offset;
+                failures = 0;
+                onProgress(offset / file.size);
+            } catch (error) {
+                if (error.fatal || ++failures > MAX_RETRIES) throw error;
+                await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** failures));
+                const status = await fetch(session.upload_url).then(r => r.json()).catch(() => null);
+                if (status && status.success) offset = status.offset;
+            }
+        }
+    }
+
+    async function uploadInChunks(form, file, onProgress) {
+        const session = await getSession(form, file);
+        await sendChunks(session, file, onProgress);
+        const response = await fetch(`${session.upload_url}/complete`, {method: 'POST'});
+        const data = await response.json();
+        if (!data.success) throw requestError(data, response);
+        localStorage.removeItem(storageKey(file));
+        return data;
+    }
+
+    window.submitUploadForm = function(form) {
+        const input = form.querySelector('input[type="file"][name="document"]');
+        const file = input && input.files[0];
+        if (!file || file.size <= Number(form.dataset.chunkSize)) {
+            form.submit();
+            return;
+        }
+
+        const buttons = form.querySelectorAll('button');
+        const button = form.querySelector('.btn-primary');
+        const label = button.textContent;
+        buttons.forEach(b => b.disabled = true);
+        uploadInChunks(form, file, progress => {
+            button.textContent = `Uploading... ${Math.floor(progress * 100)}%`;
+        }).then(data => {
+            window.location.href = data.redirect;
+        }).catch(error => {
+            alert('Upload failed: ' + error.message);
+            button.textContent = label;
+            buttons.forEach(b => b.disabled = false);
+        });
+    };
+
+    document.addEventListener('submit', function(e) {
+        if (e.target.dataset && e.target.dataset.chunkedUpload) {
+            e.preventDefault();
+            window.submitUploadForm(e.target);
+        }
+    });
+})();
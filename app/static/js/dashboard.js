@@ -8,55 +8,136 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Document filtering
-    const filterInput = document.getElementById('filter-documents');
-    if (filterInput) {
-        filterInput.addEventListener('keyup', function() {
-            const filterValue = this.value.toLowerCase();
-            const documentRows = document.querySelectorAll('.document-table tbody tr');
-
-            documentRows.forEach(row => {
-                const documentName = row.querySelector('td:first-child').textContent.toLowerCase();
-                const uploadedBy = row.querySelector('td:nth-child(2)').textContent.toLowerCase();
-
-                if (documentName.includes(filterValue) || uploadedBy.includes(filterValue)) {
-                    row.style.display = '';
-                } else {
-                    row.style.display = 'none';
-                }
-            });
+    // Server-side search over document names, details and text, as the user types
+    const searchInput = document.getElementById('search-documents');
+    const searchContainer = document.getElementById('search-container');
+    let searchTimer;
+    let searchRequest = 0;
+
+    if (searchInput) {
+        searchInput.addEventListener('input', function() {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => runSearch(1), 250);
+        });
+        searchContainer.querySelector('.search-more-btn').addEventListener('click', function() {
+            this.disabled = true;
+            runSearch(Number(this.dataset.page));
         });
     }
 
-    // Refresh document list periodically
-    let refreshInterval;
-    const refreshToggle = document.getElementById('auto-refresh');
+    function runSearch(page) {
+        const query = searchInput.value.trim();
+        const results = searchContainer.querySelector('tbody');
+        const moreButton = searchContainer.querySelector('.search-more-btn');
+        const request = ++searchRequest;
+        if (!query) {
+            searchContainer.hidden = true;
+            results.innerHTML = '';
+            return;
+        }
 
-    if (refreshToggle) {
-        refreshToggle.addEventListener('change', function() {
-            if (this.checked) {
-                refreshInterval = setInterval(refreshDocumentList, 30000); // Refresh every 30 seconds
-            } else {
-                clearInterval(refreshInterval);
-            }
-        });
+        const params = new URLSearchParams({q: query, page: page});
+        fetch(`${searchInput.dataset.searchUrl}?${params}`)
+            .then(response => response.json())
+            .then(data => {
+                if (request !== searchRequest) {
+                    return;  // The user kept typing
+                }
+                if (!data.success) {
+                    throw new Error(data.message);
+                }
+                if (page === 1) {
+                    results.innerHTML = '';
+                }
+                results.insertAdjacentHTML('beforeend', data.html);
+                searchContainer.querySelector('.search-empty').hidden = results.children.length > 0;
+                moreButton.hidden = !data.next_page;
+                moreButton.disabled = false;
+                moreButton.dataset.page = data.next_page || '';
+                searchContainer.hidden = false;
+            })
+            .catch(error => {
+                console.error('Error searching documents:', error);
+                moreButton.disabled = false;
+            });
     }
 
-    function refreshDocumentList() {
-        const documentList = document.querySelector('.document-table tbody');
-        const currentPage = window.location.pathname;
+    // Follow uploads, signings and deletions through the change feed (long polling)
+    const feed = document.querySelector('[data-changes-url]');
+    if (feed) {
+        followChanges(feed.dataset.changesUrl, feed.dataset.changesCursor);
+    }
+
+    // Load the next page of a dashboard table on demand
+    document.addEventListener('click', function(event) {
+        const button = event.target.closest('.load-more-btn');
+        if (!button) {
+            return;
+        }
 
-        fetch(`${currentPage}?ajax=true`)
-            .then(response => response.text())
-            .then(html => {
-                const parser = new DOMParser();
-                const doc = parser.parseFromString(html, 'text/html');
-                const newDocumentList = doc.querySelector('.document-table tbody');
+        const section = button.dataset.section;
+        const documentList = document.querySelector(`#${section}-container tbody`);
+        const params = new URLSearchParams({ajax: 'true', section: section, cursor: button.dataset.cursor});
 
-                if (newDocumentList) {
-                    documentList.innerHTML = newDocumentList.innerHTML;
+        button.disabled = true;
+        fetch(`${window.location.pathname}?${params}`)
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) {
+                    throw new Error(data.message);
+                }
+                documentList.insertAdjacentHTML('beforeend', data.html);
+                if (data.next_cursor) {
+                    button.dataset.cursor = data.next_cursor;
+                    button.disabled = false;
+                } else {
+                    button.remove();
                 }
             })
-            .catch(error => console.error('Error refreshing document list:', error));
+            .catch(error => {
+                console.error('Error loading more documents:', error);
+                button.disabled = false;
+            });
+    });
+
+    async function followChanges(url, cursor) {
+        while (true) {
+            try {
+                const response = await fetch(`${url}?since=${cursor}`);
+                if (response.redirected) {
+                    // Logged out: the login page came back instead
+                    window.location.reload();
+                    return;
+                }
+                const data = await response.json();
+                if (!data.success) {
+                    throw new Error(data.message);
+                }
+                if (data.reset) {
+                    window.location.reload();
+                    return;
+                }
+                data.changes.forEach(applyChange);
+                cursor = data.cursor;
+            } catch (error) {
+                console.error('Error following dashboard changes:', error);
+                await new Promise(resolve => setTimeout(resolve, 10000));
+            }
+        }
+    }
+
+    function applyChange(change) {
+        document.querySelectorAll(`#pending-container tr[data-doc-id="${change.document_id}"], #signed-container tr[data-doc-id="${change.document_id}"]`)
+            .forEach(row => row.remove());
+        if (!change.section) {
+            return;
+        }
+        const documentList = document.querySelector(`#${change.section}-container tbody`);
+        if (documentList) {
+            documentList.insertAdjacentHTML('afterbegin', change.html);
+        } else {
+            // The table is not there while the section is empty
+            window.location.reload();
+        }
     }
-});
\ No newline at end of file
+});
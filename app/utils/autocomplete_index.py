@@ -0,0 +1,197 @@
+# app/utils/autocomplete_index.py
+import bisect
+import heapq
+import re
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from app.models import Document
+
+FIELDS = ('client', 'work', 'document_type')
+SHORT_PREFIX = 2  # Prefixes up to this long match too many values to rank per keystroke, so they are kept ranked
+TOP_K = 50  # Suggestions kept per short prefix
+MAX_MEMO = 5000  # Memoized longer prefixes before the memo starts over
+_SEP = '\x00'  # Between the indexed text and the value key in an entry; sorts before any typed character
+_END = '\U0010ffff'  # Sorts after any typed character
+
+
+def _suffixes(key):
+    """A value from the start of each of its words, so "Acme Corp" is found by "ac" and by "co" """
+    starts = {0} | {match.start() for match in re.finditer(r'\w+', key)}
+    return [key[start:] for start in sorted(starts)]
+
+
+def _short_prefixes(key):
+    return {suffix[:n] for suffix in _suffixes(key) for n in range(1, SHORT_PREFIX + 1) if len(suffix) >= n}
+
+
+class PrefixIndex:
+    """The distinct values of one document field, found by the start of any word, most used first.
+
+    Entries are kept in one sorted list, so the values matching a prefix are a
+    contiguous run found with bisect instead of a scan. The runs for one and
+    two character prefixes are long, so their best TOP_K values are kept
+    ranked and updated as documents come and go; longer prefixes are ranked on
+    demand and memoized until a value changes. Values are matched
+    case-insensitively and shown in their most used spelling.
+    """
+
+    def __init__(self):
+        self._counts = {}  # Value key (casefolded) -> documents using it
+        self._display = {}  # Value key -> spelling shown
+        self._entries = []
+        self._top = {}  # Short prefix -> best value keys, best first
+        self._memo = {}  # (longer prefix, limit) -> suggestions
+        self._lock = threading.Lock()
+
+    def _rank(self, key):
+        return -self._counts[key], key
+
+    def _scan(self, prefix, limit):
+        lo = bisect.bisect_left(self._entries, prefix)
+        hi = bisect.bisect_left(self._entries, prefix + _END, lo)
+        keys = {entry.rsplit(_SEP, 1)[1] for entry in self._entries[lo:hi]}
+        return heapq.nsmallest(limit, keys, key=self._rank)
+
+    def load(self, value_counts):
+        """Replace the contents with (value, document count) pairs"""
+        counts, display, best = {}, {}, {}
+        for value, count in value_counts:
+            value = (value or '').strip()
+            if not value:
+                continue
+            key = value.casefold()
+            counts[key] = counts.get(key, 0) + count
+            if count > best.get(key, 0):
+                best[key] = count
+                display[key] = value
+        entries = sorted(f'{suffix}{_SEP}{key}' for key in counts for suffix in _suffixes(key))
+        top = {}
+        for key in counts:
+            for prefix in _short_prefixes(key):
+                top.setdefault(prefix, []).append(key)
+        for prefix, keys in top.items():
+            top[prefix] = heapq.nsmallest(TOP_K, keys, key=lambda k: (-counts[k], k))
+        with self._lock:
+            self._counts, self._display, self._entries, self._top, self._memo = counts, display, entries, top, {}
+
+    def add(self, value, amount=1):
+        """Count `value` on `amount` more documents (fewer, if negative)"""
+        value = (value or '').strip()
+        if not value:
+            return
+        key = value.casefold()
+        with self._lock:
+            count = self._counts.get(key, 0) + amount
+            if count > 0:
+                if key not in self._counts:
+                    self._display[key] = value
+                    for suffix in _suffixes(key):
+                        bisect.insort(self._entries, f'{suffix}{_SEP}{key}')
+                self._counts[key] = count
+            elif key in self._counts:
+                del self._counts[key]
+                del self._display[key]
+                for suffix in _suffixes(key):
+                    i = bisect.bisect_left(self._entries, f'{suffix}{_SEP}{key}')
+                    if i < len(self._entries) and self._entries[i] == f'{suffix}{_SEP}{key}':
+                        del self._entries[i]
+            else:
+                return
+            self._update_top(key, amount)
+            self._memo.clear()
+
+    def _update_top(self, key, amount):
+        for prefix in _short_prefixes(key):
+            top = self._top.get(prefix, [])
+            if amount < 0 and len(top) >= TOP_K:
+                # A value that drops may fall behind one outside the list, which only a scan finds
+                self._top[prefix] = self._scan(prefix, TOP_K)
+                continue
+            if key in top:
+                top.remove(key)
+            elif len(top) >= TOP_K and self._rank(key) > self._rank(top[-1]):
+                continue
+            if key in self._counts:
+                bisect.insort(top, key, key=self._rank)
+                del top[TOP_K:]
+            self._top[prefix] = top
+
+    def suggest(self, prefix, limit=10):
+        """[(value, document count), ...] with a word starting with `prefix`, most used first"""
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        with self._lock:
+            if len(prefix) <= SHORT_PREFIX and limit <= TOP_K:
+                keys = self._top.get(prefix, [])[:limit]
+                return [(self._display[key], self._counts[key]) for key in keys]
+            suggestions = self._memo.get((prefix, limit))
+            if suggestions is None:
+                suggestions = [(self._display[key], self._counts[key]) for key in self._scan(prefix, limit)]
+                if len(self._memo) >= MAX_MEMO:
+                    self._memo.clear()
+                self._memo[(prefix, limit)] = suggestions
+            return suggestions
+
+    def __len__(self):
+        return len(self._counts)
+
+
+# (uploader id, field) -> index of the values on that user's documents; uploader None covers everyone's
+_indexes = {}
+_loaded_at = None
+_load_lock = threading.Lock()
+
+
+def _ensure_loaded():
+    """Load every index from the documents table on first use, and again every AUTOCOMPLETE_REFRESH
+    seconds so uploads handled by other processes show up"""
+    global _indexes, _loaded_at
+    refresh = current_app.config['AUTOCOMPLETE_REFRESH']
+    with _load_lock:
+        if _loaded_at is not None and (refresh <= 0 or time.monotonic() - _loaded_at < refresh):
+            return
+        indexes = {}
+        for field in FIELDS:
+            column = getattr(Document, field)
+            rows = db.session.query(Document.uploaded_by, column, func.count()).group_by(
+                Document.uploaded_by, column).all()
+            by_user = {}
+            for user_id, value, count in rows:
+                by_user.setdefault(user_id, []).append((value, count))
+            for user_id, value_counts in by_user.items():
+                indexes[(user_id, field)] = PrefixIndex()
+                indexes[(user_id, field)].load(value_counts)
+            indexes[(None, field)] = PrefixIndex()
+            indexes[(None, field)].load((value, count) for _, value, count in rows)
+        _indexes = indexes
+        _loaded_at = time.monotonic()
+
+
+def suggest(field, prefix, limit=10, user_id=None):
+    """Values used before for a document detail field, most used first.
+
+    With `user_id`, only values from that user's own uploads are suggested.
+    """
+    _ensure_loaded()
+    index = _indexes.get((user_id, field))
+    return index.suggest(prefix, limit) if index else []
+
+
+def record_values(values, user_id, amount=1):
+    """Count the detail values of a document uploaded by `user_id` after committing it, or take them
+    off with amount=-1 after a delete.
+
+    `values` maps field names to values; fields that are not indexed are ignored.
+    """
+    if _loaded_at is None:
+        return  # Not loaded yet; the first load reads them from the table
+    with _load_lock:
+        for field in FIELDS:
+            for owner in (None, user_id):
+                _indexes.setdefault((owner, field), PrefixIndex()).add(values.get(field), amount)
@@ -0,0 +1,101 @@
+# app/utils/blob_store.py
+import os
+import tempfile
+import threading
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import or_
+
+from app.models import Document
+from app.utils.document_delivery import sha256_file
+
+# Blobs moved into the store whose document row is not committed yet, so
+# release() must leave them alone. Storing and releasing a blob hold its lock.
+_unsettled = Counter()
+_locks = [threading.Lock() for _ in range(64)]
+
+
+def _blob_lock(path):
+    return _locks[hash(path) % len(_locks)]
+
+
+def blob_root():
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'blobs')
+
+
+def blob_path(content_hash, ext):
+    """Where a blob lives: blobs/ab/cd/abcd...ef.pdf, two levels of 256 directories"""
+    return os.path.join(blob_root(), content_hash[:2], content_hash[2:4], f'{content_hash}.{ext}')
+
+
+def temp_path(suffix=''):
+    """A fresh file path inside the store, on the same filesystem as the blobs"""
+    tmp_dir = os.path.join(blob_root(), 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=tmp_dir, suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def commit_temp(tmp_file, content_hash, ext):
+    """Atomically move a temp file from temp_path() to its blob location. Returns the path.
+
+    The blob is kept from release() until settle(path) is called, once the
+    document row referring to it has been committed or rolled back.
+    """
+    path = blob_path(content_hash, ext)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _blob_lock(path):
+        # Same hash means same bytes, so replacing an existing blob is harmless
+        os.replace(tmp_file, path)
+        _unsettled[path] += 1
+    return path
+
+
+def settle(path):
+    """Let release() collect a blob from commit_temp() again"""
+    with _blob_lock(path):
+        _unsettled[path] -= 1
+        if _unsettled[path] <= 0:
+            del _unsettled[path]
+
+
+def discard_temp(tmp_file):
+    """Remove a temp file from temp_path() that never made it into the store"""
+    if tmp_file and os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+
+def store_file(src_path, ext='pdf'):
+    """Move a finished file, such as a freshly stamped PDF, into the store. Returns (path, content_hash)"""
+    content_hash = sha256_file(src_path)
+    return commit_temp(src_path, content_hash, ext), content_hash
+
+
+def reference_count(path):
+    """How many documents use a stored file, as original, PDF conversion or signed copy"""
+    return Document.query.filter(or_(Document.file_path == path, Document.converted_file_path == path,
+                                     Document.signed_file_path == path)).count()
+
+
+def release(path):
+    """Remove a stored file once no document refers to it any more.
+
+    Call after the referring document has been deleted and committed. Files from
+    before the store (uuid names under documents/) have a single reference, so
+    they are removed just as before. Like the upload session locks, blob locks
+    are per process.
+    """
+    if not path:
+        return
+    with _blob_lock(path):
+        if path not in _unsettled and reference_count(path) == 0 and os.path.exists(path):
+            os.remove(path)
+            current_app.logger.info(f'Removed unreferenced file {path}')
+
+
+def abandon(path):
+    """Settle a blob whose document row was never committed, removing it unless another document uses it"""
+    settle(path)
+    release(path)
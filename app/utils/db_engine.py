@@ -0,0 +1,47 @@
+# app/utils/db_engine.py
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    SQLite keeps Flask-SQLAlchemy's defaults and is tuned per connection by
+    configure_sqlite(). Server databases get a sized pool that checks
+    connections before use and replaces them before the server drops them.
+    """
+    if make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_pre_ping': True,
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    }
+
+
+def sqlite_pragmas(config):
+    """PRAGMA name -> value, in the order they are set on each connection"""
+    return {
+        'journal_mode': config['SQLITE_JOURNAL_MODE'],
+        'synchronous': config['SQLITE_SYNCHRONOUS'],
+        'busy_timeout': config['SQLITE_BUSY_TIMEOUT'],
+        'mmap_size': config['SQLITE_MMAP_SIZE'],
+        'cache_size': -config['SQLITE_CACHE_SIZE_KB'],  # Negative means KiB rather than pages
+    }
+
+
+def configure_sqlite(engine, config):
+    """Set the SQLite pragmas on every new connection of `engine`. Does nothing for other databases."""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
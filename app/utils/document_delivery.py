@@ -0,0 +1,80 @@
+# app/utils/document_delivery.py
+import hashlib
+import mimetypes
+import os
+
+from flask import current_app, request, send_file
+
+from app import db
+
+
+def sha256_file(path, chunk_size=1024 * 1024):
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def document_etag(document, signed):
+    """The stored content hash for the original or signed file.
+
+    Documents stored before hashes existed get theirs computed and saved on
+    first delivery.
+    """
+    attr, path = ('signed_content_hash', document.signed_file_path) if signed else ('content_hash', document.file_path)
+    value = getattr(document, attr)
+    if not value:
+        value = sha256_file(path)
+        setattr(document, attr, value)
+        db.session.commit()
+    return value
+
+
+def apply_cache_policy(response, status):
+    """Cache-Control for a document response, by document status.
+
+    Documents sit behind a login, so responses are always private. Signed files
+    never change and can be reused for DOCUMENT_CACHE_MAX_AGE_SIGNED seconds;
+    pending ones must be revalidated each time, which the ETag makes a cheap 304.
+    """
+    response.cache_control.public = False
+    response.cache_control.private = True
+    max_age = current_app.config['DOCUMENT_CACHE_MAX_AGE_SIGNED'] if status == 'signed' else 0
+    if max_age > 0:
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+        response.cache_control.max_age = 0
+    response.expires = None
+    return response
+
+
+def send_document(path, etag, status, as_attachment=False, download_name=None, mimetype=None):
+    """Serve a stored document with a strong ETag, If-None-Match/304 and Range support.
+
+    When DOCUMENT_ACCEL_REDIRECT_PREFIX is set, the file body is left to nginx
+    through X-Accel-Redirect (nginx then handles Range itself). Flask's own
+    USE_X_SENDFILE setting works as well for Apache/lighttpd.
+    """
+    mimetype = mimetype or mimetypes.guess_type(download_name or path)[0] or 'application/octet-stream'
+    accel_prefix = current_app.config['DOCUMENT_ACCEL_REDIRECT_PREFIX']
+
+    if accel_prefix:
+        relative = os.path.relpath(path, current_app.config['UPLOAD_FOLDER']).replace(os.sep, '/')
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{relative}"
+        if as_attachment or download_name:
+            response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                                 filename=download_name or os.path.basename(path))
+        response.set_etag(etag)
+        response = response.make_conditional(request.environ)
+        if response.status_code == 304:
+            response.headers.pop('X-Accel-Redirect', None)
+    else:
+        response = send_file(path, mimetype=mimetype, as_attachment=as_attachment,
+                             download_name=download_name, conditional=True, etag=etag)
+
+    return apply_cache_policy(response, status)
@@ -0,0 +1,113 @@
+# app/utils/lookup_cache.py
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+from app.models import Signature, User
+
+BossRef = namedtuple('BossRef', 'id email')
+
+
+class TTLCache:
+    """Values loaded on a miss and kept for LOOKUP_CACHE_TTL seconds, with hit and miss counts.
+
+    Values are plain data, never ORM objects, so they can be shared between
+    requests. Writers call invalidate() after committing; a value loaded while
+    an invalidation happened is returned but not kept.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # key -> (expires, value)
+        self._generation = 0  # Bumped by every invalidation
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        ttl = current_app.config['LOOKUP_CACHE_TTL']
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        value = load()
+        with self._lock:
+            if ttl > 0 and generation == self._generation:
+                self._entries[key] = (now + ttl, value)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+_boss = TTLCache('boss')
+_signatures = TTLCache('signatures')
+CACHES = (_boss, _signatures)
+
+
+def get_boss():
+    """The boss account as a BossRef, or None if there is none yet.
+
+    Boss accounts are only created by the setup scripts, in another process, so
+    this relies on the TTL rather than invalidation.
+    """
+    def load():
+        row = User.query.with_entities(User.id, User.email).filter_by(role='boss').first()
+        return BossRef(row.id, row.email) if row else None
+    return _boss.get('boss', load)
+
+
+def get_user_signatures(user_id):
+    """A user's signatures as plain dicts in id order. Shared between callers, so do not modify them."""
+    def load():
+        return tuple(
+            {
+                'id': sig.id,
+                'signature_path': sig.signature_path,
+                'signature_type': sig.signature_type,
+                'display_name': sig.display_name,
+                'created_date': sig.created_date,
+                'is_active': sig.is_active,
+                'is_default': sig.is_default,
+            }
+            for sig in Signature.query.filter_by(user_id=user_id).order_by(Signature.id)
+        )
+    return _signatures.get(user_id, load)
+
+
+def find_active_signature(user_id, sig_type):
+    """The user's active signature of one type, or None"""
+    return next((sig for sig in get_user_signatures(user_id)
+                 if sig['is_active'] and sig['signature_type'] == sig_type), None)
+
+
+def get_default_signature_ids(user_id):
+    """Signature type -> id of the user's default signature of that type"""
+    return {sig['signature_type']: sig['id'] for sig in get_user_signatures(user_id) if sig['is_default']}
+
+
+def invalidate_signatures(user_id):
+    """Call after committing any change to a user's signatures"""
+    _signatures.invalidate(user_id)
+
+
+def cache_stats():
+    """Cache name -> hits, misses and entries, for monitoring"""
+    return {cache.name: cache.stats() for cache in CACHES}
@@ -0,0 +1,60 @@
+# app/utils/page_render.py
+import os
+
+import pymupdf
+
+JPEG_QUALITY = 85
+
+
+def _box(x0, y0, x1, y1):
+    return [round(x0, 2), round(y0, 2), round(x1, 2), round(y1, 2)]
+
+
+def _pdf_boxes(page):
+    """MediaBox and CropBox in PDF user space. PyMuPDF reports the CropBox measured down from the MediaBox top."""
+    media, crop = page.mediabox, page.cropbox
+    return _box(*media), _box(crop.x0, media.y1 - crop.y1, crop.x1, media.y1 - crop.y0)
+
+
+def page_geometry(pdf_path):
+    """Geometry of every page, measured once at ingest and stored on the document.
+
+    Each page is a dict with its MediaBox and CropBox in PDF user space, its
+    /Rotate angle, and its visible width and height in points with rotation
+    and CropBox applied as pdf.js does. Saved signature positions are measured
+    from the top-left corner of the visible page.
+    """
+    geometry = []
+    with pymupdf.open(pdf_path) as doc:
+        for page in doc:
+            mediabox, cropbox = _pdf_boxes(page)
+            geometry.append({
+                'width': round(page.rect.width, 2),
+                'height': round(page.rect.height, 2),
+                'mediabox': mediabox,
+                'cropbox': cropbox,
+                'rotation': page.rotation,
+            })
+    return geometry
+
+
+def render_pages(pdf_path, jobs):
+    """Rasterize pages to JPEG files, opening the PDF once.
+
+    `jobs` is a list of (page_index, zoom, out_path). Takes and returns plain
+    data so it can run in a worker process; PyMuPDF must not be shared between
+    threads. Returns [(out_path, size_in_bytes), ...].
+    """
+    results = []
+    with pymupdf.open(pdf_path) as doc:
+        for page_index, zoom, out_path in jobs:
+            if page_index >= doc.page_count:
+                continue
+            if not os.path.exists(out_path):
+                pix = doc[page_index].get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+                os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                tmp_path = f'{out_path}.{os.getpid()}.tmp'
+                pix.save(tmp_path, output='jpeg', jpg_quality=JPEG_QUALITY)
+                os.replace(tmp_path, out_path)
+            results.append((out_path, os.path.getsize(out_path)))
+    return results
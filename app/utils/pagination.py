@@ -0,0 +1,44 @@
+# app/utils/pagination.py
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(sort_value, row_id):
+    """Opaque cursor pointing just past (sort_value, row_id)"""
+    raw = f"{sort_value.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError for a malformed cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_part, id_part = base64.urlsafe_b64decode(padded.encode()).decode().rsplit('|', 1)
+        return datetime.fromisoformat(sort_part), int(id_part)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def keyset_page(query, sort_column, id_column, cursor=None, per_page=50):
+    """One page of `query`, newest first, continuing after `cursor`.
+
+    Seeks on (sort_column, id_column) instead of using OFFSET, so every page
+    costs the same however deep the user scrolls. Returns (rows, next_cursor);
+    next_cursor is None on the last page.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, id_column < row_id)
+        ))
+
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    if len(rows) <= per_page:
+        return rows, None
+
+    rows = rows[:per_page]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
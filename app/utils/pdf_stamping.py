@@ -0,0 +1,261 @@
+# app/utils/pdf_stamping.py
+import shutil
+import threading
+from io import BytesIO
+
+import pymupdf
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import ArrayObject, DecodedStreamObject, DictionaryObject, IndirectObject, NameObject
+from reportlab.pdfgen import canvas
+
+from app.instrumentation import timed
+from app.utils.signature_cache import get_signature_asset
+
+# PyMuPDF is not thread-safe. Signing jobs stamp in worker processes (see app/signing_jobs.py), where this is
+# never contended; it keeps anything stamping on threads of its own from running MuPDF concurrently.
+_mupdf_lock = threading.Lock()
+
+# Size caps per signature type, in points
+MAX_BOX = {
+    'initial': (80, 35),
+    'company': (200, 60),
+}
+
+
+def fit_signature(pos, asset):
+    """Work out where a signature image goes inside its placement box.
+
+    Returns (x, top, width, height) in points, measured from the top-left corner
+    of the page like the positions saved by the viewer.
+    """
+    sx, sy = float(pos['x']), float(pos['y'])
+    sw, sh = float(pos.get('width', 150)), float(pos.get('height', 50))
+    sig_type = pos.get('type', 'signature')
+
+    # Apply maximum dimensions so initials and stamps don't come out too large
+    if sig_type in MAX_BOX:
+        max_w, max_h = MAX_BOX[sig_type]
+        sw = min(sw, max_w)
+        sh = min(sh, max_h)
+
+    if sig_type == 'initial':
+        # Initials keep their natural size: scale down to fit, never scale up
+        scale_factor = min(sw / asset.width, sh / asset.height, 1.0)
+        actual_width = asset.width * scale_factor
+        actual_height = asset.height * scale_factor
+    else:
+        # Full signatures fill the box while keeping their aspect ratio
+        box_aspect = sw / sh if sh > 0 else 1
+        if asset.aspect_ratio > box_aspect:
+            actual_width = sw
+            actual_height = sw / asset.aspect_ratio
+        else:
+            actual_height = sh
+            actual_width = sh * asset.aspect_ratio
+
+    # Center the signature within the box
+    x_offset = (sw - actual_width) / 2
+    y_offset = (sh - actual_height) / 2
+    return sx + x_offset, sy + (sh - actual_height - y_offset), actual_width, actual_height
+
+
+def build_overlay(page_sizes, placements_by_page):
+    """Render every stamped page into one multi-page overlay PDF.
+
+    `page_sizes` maps page index to (width, height) and `placements_by_page` maps
+    page index to a list of (position, SignatureAsset). ReportLab registers each
+    distinct image once per document, so a signature repeated on every page is
+    embedded as a single XObject that all overlay pages reference.
+
+    Returns a dict of page index -> overlay PageObject.
+    """
+    stamped_pages = sorted(placements_by_page)
+    if not stamped_pages:
+        return {}
+
+    packet = BytesIO()
+    c = canvas.Canvas(packet)
+    for page_num in stamped_pages:
+        w_pt, h_pt = page_sizes[page_num]
+        c.setPageSize((w_pt, h_pt))
+        for pos, asset in placements_by_page[page_num]:
+            x, top, width, height = fit_signature(pos, asset)
+            c.drawImage(asset.reader, x, h_pt - top - height,
+                        width=width, height=height,
+                        mask='auto', preserveAspectRatio=True)
+        c.showPage()
+    c.save()
+
+    packet.seek(0)
+    overlay = PdfReader(packet)
+    return dict(zip(stamped_pages, overlay.pages))
+
+
+def _content_stream(writer, data):
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    return writer._add_object(stream)
+
+
+def _resolve(obj):
+    return obj.get_object() if isinstance(obj, IndirectObject) else obj
+
+
+def append_overlay(writer, page, overlay, wrap):
+    """Draw an overlay page on top of a page that already belongs to `writer`.
+
+    Instead of PageObject.merge_page, which decodes and re-encodes the page's
+    content, the overlay's content stream is appended to the page's /Contents
+    array and its image XObjects are added to the page resources. `wrap` is a
+    pair of shared "q"/"Q" streams that isolate the original graphics state.
+    """
+    resources = DictionaryObject(_resolve(page.raw_get('/Resources')) if '/Resources' in page else {})
+    xobjects = DictionaryObject(_resolve(resources.raw_get('/XObject')) if '/XObject' in resources else {})
+    overlay_resources = _resolve(overlay.raw_get('/Resources'))
+    overlay_xobjects = _resolve(overlay_resources.raw_get('/XObject')) if '/XObject' in overlay_resources else {}
+    for name, ref in overlay_xobjects.items():
+        # Cloning through the writer keeps one copy of each image however many pages use it
+        xobjects[NameObject(name)] = ref.clone(writer)
+    resources[NameObject('/XObject')] = xobjects
+    page[NameObject('/Resources')] = resources
+
+    contents = ArrayObject()
+    if '/Contents' in page:
+        existing = page.raw_get('/Contents')
+        contents.append(wrap[0])
+        if isinstance(_resolve(existing), ArrayObject):
+            contents.extend(_resolve(existing))
+        else:
+            contents.append(existing)
+        contents.append(wrap[1])
+    contents.append(overlay.raw_get('/Contents').clone(writer))
+    page[NameObject('/Contents')] = contents
+
+
+def stamp_pdf(pdf_path, out_path, placements, incremental=False):
+    """PyPDF2 backend: write a copy of pdf_path to out_path with the signature placements drawn on.
+
+    `placements` is a list of (position, SignatureAsset) pairs. Positions that
+    point past the last page are ignored. PyPDF2 3.x cannot append incremental
+    updates, so `incremental` is accepted for the backend interface but the
+    file is always rewritten.
+    """
+    with timed('signing', 'read'):
+        reader = PdfReader(pdf_path)
+        page_count = len(reader.pages)
+
+        placements_by_page = {}
+        for pos, asset in placements:
+            page_num = int(pos['page'])
+            if 0 <= page_num < page_count:
+                placements_by_page.setdefault(page_num, []).append((pos, asset))
+
+        page_sizes = {}
+        for page_num in placements_by_page:
+            mediabox = reader.pages[page_num].mediabox
+            page_sizes[page_num] = (float(mediabox.width), float(mediabox.height))
+
+    with timed('signing', 'overlay_render'):
+        overlays = build_overlay(page_sizes, placements_by_page)
+
+    with timed('signing', 'merge'):
+        writer = PdfWriter()
+        wrap = None
+        for page_num, page in enumerate(reader.pages):
+            new_page = writer.add_page(page)
+            if page_num in overlays:
+                if wrap is None:
+                    wrap = (_content_stream(writer, b'q\n'), _content_stream(writer, b'\nQ\n'))
+                append_overlay(writer, new_page, overlays[page_num], wrap)
+
+    with timed('signing', 'write'):
+        with open(out_path, 'wb') as out_f:
+            writer.write(out_f)
+    return out_path
+
+
+def _insert_placements(doc, placements):
+    xrefs = {}
+    for pos, asset in placements:
+        page_num = int(pos['page'])
+        if not 0 <= page_num < doc.page_count:
+            continue
+        page = doc[page_num]
+        x, top, width, height = fit_signature(pos, asset)
+        # Same spot as stamp_pdf: measured from the top of the MediaBox in PDF user space
+        h_pt = page.mediabox.height
+        rect = pymupdf.Rect(x, h_pt - top - height, x + width, h_pt - top) * page.transformation_matrix
+        # Each distinct image is embedded once; later placements reuse its xref
+        xrefs[id(asset)] = page.insert_image(rect, stream=asset.png_bytes(), xref=xrefs.get(id(asset), 0),
+                                             keep_proportion=False)
+
+
+def stamp_pdf_pymupdf(pdf_path, out_path, placements, incremental=False):
+    """PyMuPDF backend: like stamp_pdf, but MuPDF parses and writes the file.
+
+    With `incremental`, out_path starts as a byte copy of the original and the
+    signatures are appended as an incremental update. Only the stamped page
+    objects, their new content streams and the images are written after the
+    original bytes, so the cost follows the number of stamped pages rather
+    than the size of the document. Files MuPDF had to repair on open cannot
+    take an update and are rewritten instead.
+
+    MuPDF draws straight onto the pages, so there is no separate merge phase.
+    Calls in one process run one at a time (see _mupdf_lock).
+    """
+    with _mupdf_lock:
+        if incremental:
+            with timed('signing', 'read'):
+                shutil.copyfile(pdf_path, out_path)
+                doc = pymupdf.open(out_path)
+            with doc:
+                if doc.can_save_incrementally():
+                    with timed('signing', 'overlay_render'):
+                        _insert_placements(doc, placements)
+                    with timed('signing', 'write'):
+                        doc.save(out_path, incremental=True, encryption=pymupdf.PDF_ENCRYPT_KEEP, deflate=True)
+                    return out_path
+
+        with timed('signing', 'read'):
+            doc = pymupdf.open(pdf_path)
+        with doc:
+            with timed('signing', 'overlay_render'):
+                _insert_placements(doc, placements)
+            with timed('signing', 'write'):
+                doc.save(out_path, garbage=1, deflate=True)
+        return out_path
+
+
+# Stamping engines by PDF_BACKEND name, all called as (pdf_path, out_path, placements, incremental)
+BACKENDS = {
+    'pypdf2': stamp_pdf,
+    'pymupdf': stamp_pdf_pymupdf,
+}
+
+
+def get_backend(name):
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown PDF backend {name!r}, expected one of: {', '.join(BACKENDS)}")
+
+
+def sign_pdf_file(pdf_path, out_path, positions, signature_paths, backend='pymupdf', incremental=False):
+    """Stamp positions that carry a signatureId, looking the images up in signature_paths.
+
+    `backend` names an entry in BACKENDS; `incremental` asks it to append an
+    incremental update where it can. Only plain data goes in and out, so this
+    can run in a worker process; each process keeps its own signature asset cache.
+    """
+    stamp = get_backend(backend)
+    placements = []
+    with timed('signing', 'signature_load'):
+        for pos in positions:
+            sig_id = pos.get('signatureId')
+            sig_path = signature_paths.get(str(sig_id)) if sig_id else None
+            if not sig_path:
+                continue  # Skip if no valid signature ID
+            asset = get_signature_asset(sig_id, sig_path)
+            if asset:
+                placements.append((pos, asset))
+    return stamp(pdf_path, out_path, placements, incremental=incremental)
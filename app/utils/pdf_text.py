@@ -0,0 +1,20 @@
+# app/utils/pdf_text.py
+import pymupdf
+
+
+def extract_text(pdf_path, max_chars):
+    """Text of a PDF's pages for the search index, cut off after `max_chars` characters.
+
+    Runs in a worker process like the page rendering; PyMuPDF must not be
+    shared between threads.
+    """
+    parts = []
+    total = 0
+    with pymupdf.open(pdf_path) as doc:
+        for page in doc:
+            text = page.get_text()
+            parts.append(text)
+            total += len(text)
+            if total >= max_chars:
+                break
+    return ''.join(parts)[:max_chars]
@@ -0,0 +1,73 @@
+# app/utils/signature_cache.py
+import os
+import threading
+from io import BytesIO
+
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+
+DEFAULT_ASPECT_RATIO = 3  # 150/50, used when a signature image cannot be read
+
+
+class SignatureAsset:
+    """A signature image decoded once and ready to be drawn into a PDF"""
+
+    def __init__(self, path, image):
+        self.path = path
+        self.image = image
+        self.width, self.height = image.size
+        self.aspect_ratio = self.width / self.height if self.height > 0 else 1
+        self.reader = ImageReader(image)
+        # Decode the colour and alpha planes now so every placement reuses them
+        self.reader.getRGBData()
+        self._png = None
+
+    def png_bytes(self):
+        """The image encoded as PNG, for stamping engines that embed encoded images"""
+        if self._png is None:
+            buf = BytesIO()
+            self.image.save(buf, format='PNG')
+            self._png = buf.getvalue()
+        return self._png
+
+
+# signature id -> (file mtime, SignatureAsset)
+_assets = {}
+_lock = threading.Lock()
+
+
+def get_signature_asset(sig_id, sig_path):
+    """Return the cached asset for a signature, reloading it if the file changed.
+
+    Returns None when the file is missing or is not a readable image.
+    """
+    try:
+        mtime = os.path.getmtime(sig_path)
+    except OSError:
+        return None
+
+    key = str(sig_id)
+    with _lock:
+        cached = _assets.get(key)
+    if cached and cached[0] == mtime and cached[1].path == sig_path:
+        return cached[1]
+
+    try:
+        with Image.open(sig_path) as img:
+            img.load()
+            asset = SignatureAsset(sig_path, img.copy())
+    except Exception:
+        return None
+
+    with _lock:
+        _assets[key] = (mtime, asset)
+    return asset
+
+
+def invalidate_signature_asset(sig_id=None):
+    """Drop one signature from the cache, or all of them when sig_id is None"""
+    with _lock:
+        if sig_id is None:
+            _assets.clear()
+        else:
+            _assets.pop(str(sig_id), None)
@@ -0,0 +1,53 @@
+# app/utils/signature_image.py
+from PIL import Image, ImageChops
+
+
+def _alpha_lut(threshold, feather):
+    """Lookup table mapping the darkest channel of a pixel to an alpha multiplier.
+
+    Pixels whose darkest channel is above `threshold` are "almost white" and become
+    fully transparent. With a feather, pixels in (threshold - feather, threshold]
+    fade linearly instead of switching hard from opaque to transparent.
+    """
+    lut = []
+    start = threshold - feather
+    for value in range(256):
+        if value > threshold:
+            lut.append(0)
+        elif feather > 0 and value > start:
+            lut.append(int(round(255 * (threshold - value) / feather)))
+        else:
+            lut.append(255)
+    return lut
+
+
+def remove_background(img, threshold=240, feather=0):
+    """Make near-white pixels of an RGBA image transparent using band operations"""
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+
+    r, g, b, a = img.split()
+    # The darkest channel decides whether a pixel counts as white paper
+    darkest = ImageChops.darker(ImageChops.darker(r, g), b)
+    mask = darkest.point(_alpha_lut(threshold, feather))
+    # Keep any transparency the upload already had
+    img.putalpha(ImageChops.multiply(a, mask))
+    return img
+
+
+def downscale(img, max_dimension):
+    """Shrink an image in place so neither side exceeds max_dimension"""
+    if max_dimension and max(img.size) > max_dimension:
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    return img
+
+
+def prepare_signature_image(fp, threshold=240, feather=0, max_dimension=None):
+    """Load an uploaded signature, downscale it, drop the background and crop to the ink"""
+    img = Image.open(fp).convert('RGBA')
+    img = downscale(img, max_dimension)
+    img = remove_background(img, threshold=threshold, feather=feather)
+    bbox = img.getbbox()
+    if bbox:
+        img = img.crop(bbox)
+    return img
@@ -0,0 +1,52 @@
+# app/utils/signature_placements.py
+from sqlalchemy import delete, insert
+
+from app import db
+from app.models import SignaturePlacement
+
+PLACEMENT_TYPES = ('signature', 'initial', 'company')
+_COLUMNS = (SignaturePlacement.document_id, SignaturePlacement.page, SignaturePlacement.x, SignaturePlacement.y,
+            SignaturePlacement.width, SignaturePlacement.height, SignaturePlacement.type)
+
+
+def _position(page, x, y, width, height, placement_type):
+    """A placement as the position dict the viewer and the stampers use; no width/height means the default box"""
+    position = {'page': page, 'x': x, 'y': y, 'type': placement_type}
+    if width is not None:
+        position['width'] = width
+    if height is not None:
+        position['height'] = height
+    return position
+
+
+def positions_by_document(document_ids):
+    """{document id: [position, ...]} for documents with saved placements, in saved order, from one query"""
+    positions = {}
+    rows = db.session.query(*_COLUMNS).filter(
+        SignaturePlacement.document_id.in_(list(document_ids))
+    ).order_by(SignaturePlacement.document_id, SignaturePlacement.id)
+    for document_id, *fields in rows:
+        positions.setdefault(document_id, []).append(_position(*fields))
+    return positions
+
+
+def get_positions(document_id):
+    """The positions saved for one document, in saved order"""
+    return positions_by_document([document_id]).get(document_id, [])
+
+
+def replace_positions(document_id, positions):
+    """Swap a document's placements for `positions` (already validated). The caller commits."""
+    db.session.execute(delete(SignaturePlacement).where(SignaturePlacement.document_id == document_id))
+    rows = [{
+        'document_id': document_id,
+        'page': int(pos['page']),
+        'x': float(pos['x']),
+        'y': float(pos['y']),
+        'width': float(pos['width']) if pos.get('width') is not None else None,
+        'height': float(pos['height']) if pos.get('height') is not None else None,
+        'type': pos.get('type') or 'signature',
+    } for pos in positions]
+    if rows:
+        # One executemany for all of them
+        db.session.execute(insert(SignaturePlacement), rows)
@@ -0,0 +1,340 @@
+# app/utils/upload_ingest.py
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+
+from flask import current_app, request
+from PyPDF2 import PdfReader
+from werkzeug.formparser import parse_form_data
+from werkzeug.utils import secure_filename
+
+from app.instrumentation import timed
+from app.utils.blob_store import blob_root, commit_temp, discard_temp, temp_path
+
+CHUNK_SIZE = 1024 * 1024
+
+# Leading bytes per extension. PDF readers accept junk before the header, so it is searched for.
+MAGIC = {
+    'pdf': b'%PDF-',
+    'docx': b'PK\x03\x04',
+    'doc': b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',
+}
+PDF_HEADER_WINDOW = 1024
+
+# A page object, not the /Pages tree nodes. Whitespace is bounded so a match fits in the carried tail.
+PAGE_OBJECT = re.compile(rb'/Type\s{0,16}/Page(?![A-Za-z])')
+EOF_MARKER = re.compile(rb'%%EOF')
+SCAN_TAIL = 64
+
+IngestResult = namedtuple('IngestResult', 'path content_hash size page_count')
+
+
+class IngestError(ValueError):
+    """The upload is not the file type it claims to be"""
+
+
+class PageScanner:
+    """Counts PDF page objects in a byte stream fed chunk by chunk.
+
+    Matches can straddle chunks, so the last few bytes are carried over and a
+    match is only counted once the byte after it has been seen.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.revisions = 0
+        self._tail = b''
+        self._offset = 0  # Absolute offset of self._tail
+        self._counted = 0  # Matches ending at or before this absolute offset are already counted
+
+    def update(self, chunk, final=False):
+        buf = self._tail + chunk
+        limit = self._offset + len(buf) - (0 if final else 1)
+        for pattern, attr in ((PAGE_OBJECT, 'pages'), (EOF_MARKER, 'revisions')):
+            for match in pattern.finditer(buf):
+                end = self._offset + match.end()
+                if self._counted < end <= limit:
+                    setattr(self, attr, getattr(self, attr) + 1)
+        self._counted = limit
+        keep = min(SCAN_TAIL, len(buf))
+        self._offset += len(buf) - keep
+        self._tail = buf[len(buf) - keep:]
+
+
+class Ingest:
+    """Hashing, type check and page count for an upload, done as its bytes go by"""
+
+    def __init__(self, ext):
+        self.ext = ext
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._head = b''
+        self._type_checked = ext not in MAGIC
+        self._scanner = PageScanner() if ext == 'pdf' else None
+
+    def update(self, chunk):
+        self._digest.update(chunk)
+        self.size += len(chunk)
+        if not self._type_checked:
+            self._head += chunk[:PDF_HEADER_WINDOW]
+            self._check_type()
+        if self._scanner:
+            self._scanner.update(chunk)
+
+    def _check_type(self, final=False):
+        magic = MAGIC[self.ext]
+        window = PDF_HEADER_WINDOW if self.ext == 'pdf' else len(magic)
+        head = self._head[:window]
+        found = magic in head if self.ext == 'pdf' else head.startswith(magic)
+        if found:
+            self._type_checked = True
+            self._head = b''
+        elif final or len(head) >= window:
+            raise IngestError(f'File is not a valid {self.ext.upper()} document')
+
+    def finish(self, path):
+        """Final checks once every byte has been seen. Returns an IngestResult for `path`."""
+        if not self._type_checked:
+            self._check_type(final=True)
+        page_count = None
+        if self._scanner:
+            self._scanner.update(b'', final=True)
+            page_count = self._scanner.pages
+            # Object streams hide page objects and incremental updates repeat them;
+            # the page tree root has the real count and is a cheap random read.
+            if page_count == 0 or self._scanner.revisions > 1:
+                page_count = pdf_page_count(path) or page_count or None
+        return IngestResult(path, self._digest.hexdigest(), self.size, page_count)
+
+
+def pdf_page_count(path):
+    try:
+        return int(PdfReader(path).trailer['/Root']['/Pages']['/Count'])
+    except Exception:
+        return None
+
+
+def _copy(stream, out, ingest, limit=None):
+    """Copy a stream into an open file, feeding the ingest. Returns the bytes copied."""
+    copied = 0
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        copied += len(chunk)
+        if limit is not None and copied > limit:
+            raise IngestError('Upload is larger than announced')
+        ingest.update(chunk)
+        out.write(chunk)
+    return copied
+
+
+class _IngestingFile:
+    """Where the form parser writes an uploaded file: straight into the store, checked as it goes"""
+
+    def __init__(self, ext):
+        self.path = temp_path('.part')
+        self.ingest = Ingest(ext)
+        self._file = open(self.path, 'w+b')
+
+    def write(self, chunk):
+        self.ingest.update(chunk)
+        return self._file.write(chunk)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+@contextmanager
+def form_upload(max_size):
+    """Parse the current multipart request, writing its files into the blob store as they arrive.
+
+    Yields (form, files) like request.form and request.files, which would
+    spool each file to a temp file of Werkzeug's own before it could be
+    copied into the store. A file that is not the type its name claims stops
+    the upload with an IngestError. Store a file with finish_upload(); the
+    rest are removed on exit.
+    """
+    streams = []
+
+    def stream_factory(total_content_length, content_type, filename, content_length=None):
+        # The extension the routes take from the same secure_filename(), checked against the content
+        name = secure_filename(filename or '')
+        streams.append(_IngestingFile(name.rsplit('.', 1)[1].lower() if '.' in name else ''))
+        return streams[-1]
+
+    try:
+        with timed('upload', 'ingest'):
+            _, form, files = parse_form_data(request.environ, stream_factory=stream_factory,
+                                             max_content_length=max_size, silent=False)
+        yield form, files
+    finally:
+        for stream in streams:
+            stream.close()
+            discard_temp(stream.path)
+
+
+def finish_upload(file):
+    """Move a file from form_upload() into the blob store in one pass. Returns an IngestResult."""
+    stream = file.stream
+    stream.close()
+    with timed('upload', 'finish'):
+        result = stream.ingest.finish(stream.path)
+        return result._replace(path=commit_temp(stream.path, result.content_hash, stream.ingest.ext))
+
+
+# Resumable uploads. Each session is a .part file plus a .json sidecar on disk,
+# so any worker can take the next chunk. The running Ingest is kept in memory
+# by the process that saw the previous chunk; another process rebuilds it by
+# replaying the .part file once.
+
+_live = {}
+_locks = {}
+_live_lock = threading.Lock()
+
+
+def _session_lock(upload_id):
+    with _live_lock:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+
+def _session_dir():
+    path = os.path.join(blob_root(), 'tmp', 'uploads')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _session_files(upload_id):
+    if not re.fullmatch(r'[0-9a-f]{32}', upload_id or ''):
+        return None, None
+    base = os.path.join(_session_dir(), upload_id)
+    return f'{base}.part', f'{base}.json'
+
+
+def _save_meta(meta_file, meta):
+    tmp = f'{meta_file}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_file)
+
+
+def get_upload_session(upload_id):
+    """The session metadata dict, or None if there is no such upload"""
+    _, meta_file = _session_files(upload_id)
+    if not meta_file or not os.path.exists(meta_file):
+        return None
+    with open(meta_file) as f:
+        return json.load(f)
+
+
+def start_upload_session(user_id, original_filename, ext, size, fields):
+    """Open a resumable upload. `fields` are the form details saved with the document."""
+    purge_stale_sessions()
+    upload_id = uuid.uuid4().hex
+    part_file, meta_file = _session_files(upload_id)
+    open(part_file, 'wb').close()
+    meta = {
+        'id': upload_id,
+        'user_id': user_id,
+        'original_filename': original_filename,
+        'ext': ext,
+        'size': size,
+        'offset': 0,
+        'fields': fields,
+    }
+    _save_meta(meta_file, meta)
+    _live[upload_id] = Ingest(ext)
+    return meta
+
+
+def _live_ingest(meta, part_file):
+    ingest = _live.get(meta['id'])
+    if ingest is None or ingest.size != meta['offset']:
+        ingest = Ingest(meta['ext'])
+        remaining = meta['offset']
+        with open(part_file, 'rb') as f:
+            while remaining:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                ingest.update(chunk)
+                remaining -= len(chunk)
+        _live[meta['id']] = ingest
+    return ingest
+
+
+def append_upload_chunk(meta, offset, stream):
+    """Append one chunk at `offset`. Returns the new offset.
+
+    Raises ValueError if `offset` is not where the upload left off; the caller
+    should tell the client the current offset so it can resume from there.
+    """
+    part_file, meta_file = _session_files(meta['id'])
+    with _session_lock(meta['id']):
+        meta = get_upload_session(meta['id'])
+        if meta is None:
+            raise ValueError('Upload not found')
+        if offset != meta['offset']:
+            raise ValueError(f"Expected offset {meta['offset']}")
+        ingest = _live_ingest(meta, part_file)
+        try:
+            with timed('upload', 'ingest'), open(part_file, 'r+b') as out:
+                out.seek(offset)
+                copied = _copy(stream, out, ingest, limit=meta['size'] - offset)
+                out.truncate()
+        except BaseException:
+            # Leave the session resumable from the last complete chunk
+            _live.pop(meta['id'], None)
+            with open(part_file, 'r+b') as out:
+                out.truncate(meta['offset'])
+            raise
+        meta['offset'] += copied
+        _save_meta(meta_file, meta)
+        return meta['offset']
+
+
+def complete_upload_session(meta):
+    """Move a fully received upload into the blob store. Returns an IngestResult."""
+    part_file, meta_file = _session_files(meta['id'])
+    with _session_lock(meta['id']):
+        meta = get_upload_session(meta['id'])
+        if meta is None:
+            raise ValueError('Upload not found')
+        if meta['offset'] != meta['size']:
+            raise ValueError(f"Upload incomplete: {meta['offset']} of {meta['size']} bytes received")
+        ingest = _live_ingest(meta, part_file)
+        try:
+            with timed('upload', 'finish'):
+                result = ingest.finish(part_file)
+            return result._replace(path=commit_temp(part_file, result.content_hash, meta['ext']))
+        finally:
+            # Done with either way: a file that failed its checks cannot be resumed
+            _discard(meta['id'])
+
+
+def abort_upload_session(meta):
+    with _session_lock(meta['id']):
+        _discard(meta['id'])
+
+
+def _discard(upload_id):
+    _live.pop(upload_id, None)
+    with _live_lock:
+        _locks.pop(upload_id, None)
+    for path in _session_files(upload_id):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+def purge_stale_sessions():
+    """Drop uploads nobody has touched for UPLOAD_SESSION_TTL seconds"""
+    cutoff = time.time() - current_app.config['UPLOAD_SESSION_TTL']
+    session_dir = _session_dir()
+    for name in os.listdir(session_dir):
+        upload_id, ext = os.path.splitext(name)
+        if ext == '.part' and os.path.getmtime(os.path.join(session_dir, name)) < cutoff:
+            with _session_lock(upload_id):
+                _discard(upload_id)
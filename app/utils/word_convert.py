@@ -0,0 +1,57 @@
+# app/utils/word_convert.py
+import glob
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pymupdf
+
+_profile_dir = None  # This worker's LibreOffice user profile, reused for every conversion
+
+
+def init_worker(soffice):
+    """Process pool initializer: build a LibreOffice profile once so later conversions start warm.
+
+    Each worker gets its own profile; two soffice processes sharing one block
+    each other. A missing soffice is reported by the first conversion instead.
+    """
+    global _profile_dir
+    _profile_dir = tempfile.mkdtemp(prefix='soffice-profile-')
+    try:
+        subprocess.run([soffice, _profile_arg(), '--headless', '--terminate_after_init'],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=120)
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+
+
+def _profile_arg():
+    # A file URI, which needs file:///C:/... on Windows
+    return '-env:UserInstallation=' + Path(_profile_dir).as_uri()
+
+
+def convert_to_pdf(src_path, out_path, soffice, timeout):
+    """Convert a Word document to PDF with headless LibreOffice.
+
+    Runs in a worker process. Writes the PDF to `out_path` and returns
+    (out_path, page_count).
+    """
+    if _profile_dir is None:
+        init_worker(soffice)
+    out_dir = tempfile.mkdtemp(prefix='soffice-out-')
+    try:
+        result = subprocess.run(
+            [soffice, _profile_arg(), '--headless', '--norestore', '--convert-to', 'pdf', '--outdir', out_dir, src_path],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=timeout
+        )
+        produced = glob.glob(os.path.join(out_dir, '*.pdf'))
+        if result.returncode != 0 or not produced:
+            output = result.stdout.decode(errors='replace').strip()
+            raise RuntimeError(f'soffice could not convert {os.path.basename(src_path)}: {output or result.returncode}')
+        shutil.move(produced[0], out_path)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    with pymupdf.open(out_path) as doc:
+        return out_path, doc.page_count
@@ -0,0 +1,101 @@
+# benchmarks/bench_autocomplete.py
+"""Autocomplete latency of the prefix index against a LIKE scan of the documents table.
+
+Builds the client index from synthetic company names with skewed use counts,
+then times suggestions for prefixes of 1 to 3 characters: the first call for a
+prefix (cold, nothing memoized) and a repeat (warm). The LIKE baseline runs the
+query the index replaces on an in-memory SQLite table holding one row per
+document.
+
+Usage: python -m benchmarks.bench_autocomplete [--quick]
+"""
+import random
+import sqlite3
+import statistics
+import sys
+import time
+
+from app.utils.autocomplete_index import PrefixIndex
+
+DISTINCT_VALUES = [1000, 10000, 100000]
+QUICK_DISTINCT_VALUES = [1000, 10000]
+PREFIX_LENGTHS = (1, 2, 3)
+PREFIXES_PER_LENGTH = 200
+LIKE_PREFIXES = 20
+
+KEYS = ('values', 'prefix_length')
+METRICS = {'cold_p50_s': 'lower', 'cold_p95_s': 'lower', 'warm_p50_s': 'lower'}
+
+SYLLABLES = ['ka', 'lo', 'mi', 're', 'sa', 'to', 'vu', 'ne', 'di', 'ba', 'or', 'el', 'an', 'qu', 'zi', 'he']
+SUFFIXES = ['Holdings', 'Trust', 'Pty Ltd', 'Group', 'Partners', 'Logistics', 'Farms', 'Foods', 'Capital']
+
+
+def company_names(count, rng):
+    names = set()
+    while len(names) < count:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.add(f'{word} {rng.choice(SUFFIXES)}' if rng.random() < 0.7 else word)
+    return sorted(names)
+
+
+def timings(fn, args_list):
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_values(count, rng):
+    names = company_names(count, rng)
+    counts = [max(1, int(1000 / (rank + 1) ** 0.8)) for rank in range(count)]  # A few clients get most uploads
+    rng.shuffle(counts)
+
+    index = PrefixIndex()
+    start = time.perf_counter()
+    index.load(zip(names, counts))
+    build_s = time.perf_counter() - start
+
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE document (id INTEGER PRIMARY KEY, client TEXT)')
+    db.executemany('INSERT INTO document (client) VALUES (?)',
+                   ((name,) for name, n in zip(names, counts) for _ in range(n)))
+
+    results = []
+    for length in PREFIX_LENGTHS:
+        prefixes = sorted({name[:length].lower() for name in rng.sample(names, min(count, PREFIXES_PER_LENGTH))})
+        cold = timings(index.suggest, [(prefix,) for prefix in prefixes])
+        warm = timings(index.suggest, [(prefix,) for prefix in prefixes])
+        like = timings(lambda p: db.execute(
+            'SELECT client, count(*) FROM document WHERE client LIKE ? GROUP BY client ORDER BY 2 DESC LIMIT 10',
+            (f'%{p}%',)).fetchall(), [(prefix,) for prefix in prefixes[:LIKE_PREFIXES]])
+        results.append({
+            'values': count,
+            'documents': sum(counts),
+            'prefix_length': length,
+            'build_s': build_s,
+            'cold_p50_s': statistics.median(cold),
+            'cold_p95_s': statistics.quantiles(cold, n=20)[-1] if len(cold) > 1 else cold[0],
+            'warm_p50_s': statistics.median(warm),
+            'like_p50_s': statistics.median(like),
+        })
+    db.close()
+    return results
+
+
+def run(quick=False, seed=0):
+    rng = random.Random(seed)
+    results = []
+    for count in (QUICK_DISTINCT_VALUES if quick else DISTINCT_VALUES):
+        results.extend(run_values(count, rng))
+    return results
+
+
+if __name__ == '__main__':
+    print(f"{'values':>7} {'documents':>9} {'prefix':>6} {'build':>9} {'cold p50':>10} {'cold p95':>10} "
+          f"{'warm p50':>10} {'LIKE p50':>10}")
+    for row in run(quick='--quick' in sys.argv[1:]):
+        print(f"{row['values']:>7} {row['documents']:>9} {row['prefix_length']:>6} {row['build_s'] * 1000:>7.1f}ms "
+              f"{row['cold_p50_s'] * 1e6:>8.1f}us {row['cold_p95_s'] * 1e6:>8.1f}us {row['warm_p50_s'] * 1e6:>8.1f}us "
+              f"{row['like_p50_s'] * 1000:>8.2f}ms")
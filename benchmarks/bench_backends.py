@@ -0,0 +1,53 @@
+# benchmarks/bench_backends.py
+"""Pages per second for each stamping backend.
+
+Signs synthetic PDFs with an initial on every page and a signature on the last
+page, using every entry in BACKENDS as a full rewrite and, where it applies,
+as an incremental update. Pages per second counts all pages in the document,
+stamped or not, since that is what a signer waits on.
+
+Usage: python -m benchmarks.bench_backends [page counts...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from app.utils.pdf_stamping import BACKENDS
+from benchmarks.synthetic import make_pdf, make_signature_asset, initial_every_page
+
+PAGE_COUNTS = [10, 100, 1000]
+MODES = [(name, False) for name in BACKENDS] + [('pymupdf', True)]
+
+
+def run(page_counts=PAGE_COUNTS, repeat=3):
+    initial = make_signature_asset(200, 100, seed=1)
+    signature = make_signature_asset(600, 200, seed=2)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            src = make_pdf(os.path.join(tmp, f'in_{pages}.pdf'), pages)
+            placements = initial_every_page(pages, initial, signature)
+            for name, incremental in MODES:
+                out = os.path.join(tmp, f'out_{name}_{pages}.pdf')
+                best = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    BACKENDS[name](src, out, placements, incremental=incremental)
+                    best = min(best, time.perf_counter() - start)
+                results.append({
+                    'pages': pages,
+                    'backend': name + (' incremental' if incremental else ''),
+                    'seconds': best,
+                    'pages_per_second': pages / best,
+                    'output_bytes': os.path.getsize(out),
+                })
+    return results
+
+
+if __name__ == '__main__':
+    counts = [int(arg) for arg in sys.argv[1:]] or PAGE_COUNTS
+    print(f"{'pages':>6} {'backend':>20} {'time':>9} {'pages/s':>9} {'size':>9}")
+    for row in run(counts):
+        print(f"{row['pages']:>6} {row['backend']:>20} {row['seconds']:>8.3f}s "
+              f"{row['pages_per_second']:>9.0f} {row['output_bytes'] / 1024:>7.0f}KB")
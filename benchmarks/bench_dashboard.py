@@ -0,0 +1,163 @@
+# benchmarks/bench_dashboard.py
+"""Dashboard latency against a scratch database of 10k and 100k documents.
+
+Seeds users and documents straight into SQLite (one boss, EMPLOYEES employees,
+one in ten documents pending), then times the dashboard as the boss and as an
+employee: the full request including template rendering, the first page of
+each list query on its own, and a "Load more" request deep in the signed list.
+
+Usage: python -m benchmarks.bench_dashboard [--quick] [row counts...]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import insert
+
+from app import create_app, db
+from app.config import Config
+from app.models import Document, User
+from app.routes.documents import dashboard_list_query
+from app.utils.pagination import encode_cursor, keyset_page
+
+ROW_COUNTS = [10000, 100000]
+QUICK_ROW_COUNTS = [10000]
+EMPLOYEES = 20
+INSERT_BATCH = 5000
+DEEP_PAGE = 100  # "Load more" pressed this many times
+
+KEYS = ('rows', 'view')
+METRICS = {'p50_s': 'lower', 'p95_s': 'lower'}
+
+
+def seed(rows, seed_value=0):
+    """Insert users and `rows` documents. Returns (boss id, employee ids)."""
+    users = [User(username='boss', email='boss@example.com', role='boss')]
+    users += [User(username=f'employee{i}', email=f'employee{i}@example.com', role='employee')
+              for i in range(EMPLOYEES)]
+    for user in users:
+        user.set_password('password')
+    db.session.add_all(users)
+    db.session.commit()
+    boss_id, employee_ids = users[0].id, [user.id for user in users[1:]]
+
+    rng = random.Random(seed_value)
+    start = datetime(2024, 1, 1, tzinfo=pytz.utc)
+    batch = []
+    for i in range(rows):
+        uploaded = start + timedelta(minutes=i * 5 + rng.randrange(5))
+        signed = rng.random() >= 0.1
+        batch.append({
+            'filename': f'{i}.pdf',
+            'original_filename': f'contract-{i}.pdf',
+            'file_path': f'/nonexistent/{i}.pdf',
+            'file_type': 'pdf',
+            'uploaded_by': rng.choice(employee_ids),
+            'upload_date': uploaded,
+            'status': 'signed' if signed else 'pending',
+            'signed_date': uploaded + timedelta(hours=rng.randrange(1, 72)) if signed else None,
+            'signed_by': boss_id if signed else None,
+            'client': f'Client {rng.randrange(200)}',
+            'work': 'Audit',
+            'document_type': 'NDA',
+            'page_count': rng.randrange(1, 30),
+        })
+        if len(batch) == INSERT_BATCH:
+            db.session.execute(insert(Document), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Document), batch)
+    db.session.commit()
+    return boss_id, employee_ids
+
+
+def time_calls(fn, repeat):
+    fn()  # Warm the page cache and the query plan
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def deep_cursor(boss_id, per_page):
+    """Cursor for the signed list after DEEP_PAGE pages, as "Load more" would send it"""
+    row = dashboard_list_query(Document.status == 'signed', Document.signed_by == boss_id) \
+        .order_by(Document.signed_date.desc(), Document.id.desc()) \
+        .offset(DEEP_PAGE * per_page - 1).first()
+    return encode_cursor(row.signed_date, row.id)
+
+
+def run_rows(rows, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            UPLOAD_FOLDER = os.path.join(tmp, 'uploads')
+
+        app = create_app(BenchConfig)
+        per_page = app.config['DASHBOARD_PAGE_SIZE']
+        with app.app_context():
+            db.create_all()
+            boss_id, employee_ids = seed(rows)
+            cursor = deep_cursor(boss_id, per_page)
+
+            def query_first_pages(*criteria_by_list):
+                for criteria, sort_column in criteria_by_list:
+                    keyset_page(dashboard_list_query(*criteria), sort_column, Document.id, per_page=per_page)
+                db.session.rollback()  # Drop the identity map, as a new request would
+
+            mine = Document.uploaded_by == employee_ids[0]
+            boss_lists = (((Document.status == 'pending',), Document.upload_date),
+                          ((Document.status == 'signed', Document.signed_by == boss_id), Document.signed_date))
+            employee_lists = (((Document.status == 'pending', mine), Document.upload_date),
+                              ((Document.status == 'signed', mine), Document.signed_date))
+            cases = {
+                'boss queries': lambda: query_first_pages(*boss_lists),
+                'employee queries': lambda: query_first_pages(*employee_lists),
+            }
+
+        boss = app.test_client()
+        boss.post('/login', data={'email': 'boss@example.com', 'password': 'password'})
+        employee = app.test_client()
+        employee.post('/login', data={'email': 'employee0@example.com', 'password': 'password'})
+        cases['boss request'] = lambda: boss.get('/dashboard')
+        cases['employee request'] = lambda: employee.get('/dashboard')
+        cases['boss load more (deep)'] = lambda: boss.get(
+            '/dashboard', query_string={'ajax': 1, 'section': 'signed', 'cursor': cursor})
+
+        results = []
+        for view, fn in cases.items():
+            if view.endswith('queries'):
+                with app.app_context():
+                    latencies = time_calls(fn, repeat)
+            else:
+                latencies = time_calls(fn, repeat)  # Each request pushes its own context and session
+            results.append({
+                'rows': rows,
+                'view': view,
+                'runs': repeat,
+                'p50_s': statistics.median(latencies),
+                'p95_s': statistics.quantiles(latencies, n=20)[-1],
+            })
+        return results
+
+
+def run(quick=False, row_counts=None, repeat=30):
+    results = []
+    for rows in row_counts or (QUICK_ROW_COUNTS if quick else ROW_COUNTS):
+        results.extend(run_rows(rows, repeat))
+    return results
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    counts = [int(arg) for arg in args if arg.isdigit()]
+    print(f"{'rows':>7} {'view':>22} {'p50':>9} {'p95':>9}")
+    for row in run(quick='--quick' in args, row_counts=counts):
+        print(f"{row['rows']:>7} {row['view']:>22} {row['p50_s'] * 1000:>7.2f}ms {row['p95_s'] * 1000:>7.2f}ms")
@@ -0,0 +1,59 @@
+# benchmarks/bench_incremental.py
+"""Compare incremental-update signing with the full PDF rewrite.
+
+For each document size, signs a synthetic PDF twice: once with only a
+signature on the last page, and once with an initial on every page too. Reports
+time, output size and how many bytes were added to the original.
+
+Usage: python -m benchmarks.bench_incremental [page counts...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from app.utils.pdf_stamping import stamp_pdf, stamp_pdf_pymupdf
+from benchmarks.synthetic import make_pdf, make_signature_asset, initial_every_page
+
+PAGE_COUNTS = [10, 100, 1000]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run(page_counts=PAGE_COUNTS):
+    initial = make_signature_asset(200, 100, seed=1)
+    signature = make_signature_asset(600, 200, seed=2)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            src = make_pdf(os.path.join(tmp, f'in_{pages}.pdf'), pages)
+            every_page = initial_every_page(pages, initial, signature)
+            scenarios = (('last page', every_page[-1:]), ('every page', every_page))
+            for name, placements in scenarios:
+                rewrite_out = os.path.join(tmp, f'rewrite_{pages}.pdf')
+                incremental_out = os.path.join(tmp, f'incremental_{pages}.pdf')
+                results.append({
+                    'pages': pages,
+                    'stamped': name,
+                    'input_bytes': os.path.getsize(src),
+                    'rewrite_s': timed(stamp_pdf, src, rewrite_out, placements),
+                    'rewrite_bytes': os.path.getsize(rewrite_out),
+                    'incremental_s': timed(stamp_pdf_pymupdf, src, incremental_out, placements, True),
+                    'incremental_bytes': os.path.getsize(incremental_out),
+                })
+    return results
+
+
+if __name__ == '__main__':
+    counts = [int(arg) for arg in sys.argv[1:]] or PAGE_COUNTS
+    print(f"{'pages':>6} {'stamped':>11} {'rewrite':>9} {'incremental':>12} {'rewrite size':>13} "
+          f"{'incr. size':>11} {'appended':>9}")
+    for row in run(counts):
+        appended = row['incremental_bytes'] - row['input_bytes']
+        print(f"{row['pages']:>6} {row['stamped']:>11} {row['rewrite_s']:>8.3f}s {row['incremental_s']:>11.3f}s "
+              f"{row['rewrite_bytes'] / 1024:>11.0f}KB {row['incremental_bytes'] / 1024:>9.0f}KB "
+              f"{appended / 1024:>7.0f}KB")
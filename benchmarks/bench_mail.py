@@ -0,0 +1,96 @@
+# benchmarks/bench_mail.py
+"""Send a burst of notifications through the mail dispatcher to a local SMTP stand-in.
+
+Compares the dispatcher with the old thread-and-connection-per-email approach,
+counting SMTP sessions and messages received. Needs aiosmtpd
+(pip install aiosmtpd); nothing leaves the machine.
+
+Usage: python -m benchmarks.bench_mail [messages]
+"""
+import sys
+import threading
+import time
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    sys.exit('This benchmark needs aiosmtpd: pip install aiosmtpd')
+
+from app import create_app, mail
+from app.config import Config
+from app.email_service import build_message, queue_email
+
+PORT = 8025
+
+
+class CountingHandler:
+    """aiosmtpd handler that only counts sessions and messages"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.messages = 0
+        self.lock = threading.Lock()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        with self.lock:
+            self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        with self.lock:
+            self.messages += 1
+        return '250 Message accepted for delivery'
+
+
+class LocalSMTPConfig(Config):
+    MAIL_SERVER = '127.0.0.1'
+    MAIL_PORT = PORT
+    MAIL_USE_TLS = False
+    MAIL_USERNAME = 'esign@example.com'
+    MAIL_PASSWORD = None
+
+
+def legacy_burst(app, count):
+    """The old approach: one thread and one SMTP connection per email"""
+    def send_with_context(i):
+        with app.app_context():
+            mail.send(build_message('Legacy', f'user{i}@example.com', 'Hello'))
+
+    threads = [threading.Thread(target=send_with_context, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def dispatcher_burst(app, count):
+    with app.app_context():
+        for i in range(count):
+            queue_email('Dispatcher', f'user{i}@example.com', 'Hello')
+    app.extensions['mail_dispatcher'].join()
+
+
+def run(count=200):
+    app = create_app(LocalSMTPConfig)
+    results = []
+    for name, burst in (('thread per email', legacy_burst), ('dispatcher', dispatcher_burst)):
+        handler = CountingHandler()
+        controller = Controller(handler, hostname='127.0.0.1', port=PORT)
+        controller.start()
+        try:
+            start = time.perf_counter()
+            burst(app, count)
+            elapsed = time.perf_counter() - start
+        finally:
+            controller.stop()
+        results.append({'mode': name, 'messages': handler.messages, 'sessions': handler.sessions, 'seconds': elapsed})
+    app.extensions['mail_dispatcher'].shutdown()
+    return results
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{'mode':>18} {'received':>9} {'sessions':>9} {'time':>8}")
+    for row in run(count):
+        print(f"{row['mode']:>18} {row['messages']:>9} {row['sessions']:>9} {row['seconds']:>7.2f}s")
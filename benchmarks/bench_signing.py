@@ -0,0 +1,128 @@
+# benchmarks/bench_signing.py
+"""Throughput, latency and peak memory of stamping a PDF for a signing job.
+
+Each case signs one synthetic PDF repeatedly, with an initial on every page and
+a signature on the last, through the same calls a signing job makes: stamping
+with the configured backend (in a signing worker process, here in this one),
+then moving the result into the blob store. Cases run one at a time in a fresh process so peak RSS belongs to that
+case alone; baseline_rss_mb is the process after imports and one warm-up run.
+
+Usage: python -m benchmarks.bench_signing [--quick]
+"""
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from types import SimpleNamespace
+
+from benchmarks.synthetic import make_pdf, make_scanned_pdf, make_signature_png
+
+# (document kind, page count, page size)
+CASES = [
+    ('text', 1, 'letter'),
+    ('text', 10, 'letter'),
+    ('text', 100, 'letter'),
+    ('text', 100, 'a4-landscape'),
+    ('text', 1000, 'letter'),
+    ('scanned', 10, 'letter'),
+    ('scanned', 50, 'letter'),
+]
+QUICK_CASES = [('text', 1, 'letter'), ('text', 10, 'letter'), ('text', 100, 'letter'), ('scanned', 10, 'letter')]
+PAGE_SIZES = {'letter': (612, 792), 'a4-landscape': (842, 595)}
+
+KEYS = ('kind', 'pages', 'page_size')
+METRICS = {'p50_s': 'lower', 'p95_s': 'lower', 'pages_per_second': 'higher', 'peak_rss_mb': 'lower'}
+
+
+def _memory_mb(field):
+    """VmRSS or VmHWM (peak) of this process. Unlike ru_maxrss, the peak is not inherited
+    from the parent across fork and exec, so it covers this case alone."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024  # kB
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Not Linux: best effort
+
+
+def measure_case(kind, pages, page_size, repeat):
+    """Runs in a fresh process: set up an app on scratch storage and time repeated signings"""
+    from app import create_app
+    from app.config import Config
+    from app.signing_jobs import new_signed_path, signature_paths_for
+    from app.utils.blob_store import store_file
+    from app.utils.pdf_stamping import sign_pdf_file
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            UPLOAD_FOLDER = os.path.join(tmp, 'uploads')
+
+        app = create_app(BenchConfig)
+        make = make_scanned_pdf if kind == 'scanned' else make_pdf
+        src = make(os.path.join(tmp, 'in.pdf'), pages, PAGE_SIZES[page_size])
+        signature_files = {}
+        for sig_id, (width, height, seed) in {1: (200, 100, 1), 2: (600, 200, 2)}.items():
+            signature_files[sig_id] = os.path.join(tmp, f'signature{sig_id}.png')
+            with open(signature_files[sig_id], 'wb') as f:
+                f.write(make_signature_png(width, height, seed))
+        # Absolute paths survive the join with the static folder in signature_paths_for()
+        signatures = [SimpleNamespace(id=sig_id, signature_path=path) for sig_id, path in signature_files.items()]
+        positions = [{'page': page_num, 'x': 480, 'y': 40, 'width': 80, 'height': 35,
+                      'type': 'initial', 'signatureId': 1} for page_num in range(pages)]
+        positions.append({'page': pages - 1, 'x': 72, 'y': 600, 'width': 150, 'height': 50,
+                          'type': 'signature', 'signatureId': 2})
+
+        with app.app_context():
+            signature_paths = signature_paths_for(signatures)
+
+            def sign():
+                store_file(sign_pdf_file(src, new_signed_path(), positions, signature_paths,
+                                         app.config['PDF_BACKEND'], app.config['SIGNING_INCREMENTAL']))
+
+            sign()  # Warm-up: imports, signature decode
+            baseline = _memory_mb('VmRSS')
+            latencies = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                sign()
+                latencies.append(time.perf_counter() - start)
+
+        return {
+            'kind': kind,
+            'pages': pages,
+            'page_size': page_size,
+            'input_mb': os.path.getsize(src) / (1024 * 1024),
+            'backend': app.config['PDF_BACKEND'] + (' incremental' if app.config['SIGNING_INCREMENTAL'] else ''),
+            'runs': repeat,
+            'p50_s': statistics.median(latencies),
+            'p95_s': statistics.quantiles(latencies, n=20)[-1] if repeat > 1 else latencies[0],
+            'mean_s': statistics.fmean(latencies),
+            'documents_per_second': repeat / sum(latencies),
+            'pages_per_second': pages * repeat / sum(latencies),
+            'baseline_rss_mb': baseline,
+            'peak_rss_mb': _memory_mb('VmHWM'),
+        }
+
+
+def run(quick=False, repeat=None):
+    results = []
+    for kind, pages, page_size in (QUICK_CASES if quick else CASES):
+        runs = repeat or max(3, min(20, 2000 // pages))
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            results.append(pool.submit(measure_case, kind, pages, page_size, runs).result())
+    return results
+
+
+if __name__ == '__main__':
+    print(f"{'kind':>8} {'pages':>6} {'size':>13} {'input':>8} {'p50':>9} {'p95':>9} {'pages/s':>9} {'peak RSS':>9}")
+    for row in run(quick='--quick' in sys.argv[1:]):
+        print(f"{row['kind']:>8} {row['pages']:>6} {row['page_size']:>13} {row['input_mb']:>6.1f}MB "
+              f"{row['p50_s'] * 1000:>7.1f}ms {row['p95_s'] * 1000:>7.1f}ms {row['pages_per_second']:>9.0f} "
+              f"{row['peak_rss_mb']:>7.0f}MB")
@@ -0,0 +1,84 @@
+# benchmarks/bench_stamping.py
+"""Compare the single-overlay stamping engine with one overlay per page.
+
+Signs synthetic PDFs with an initial on every page and a signature on the
+last page, and reports time and output size.
+
+Usage: python -m benchmarks.bench_stamping [page counts...]
+"""
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from PyPDF2 import PdfReader, PdfWriter
+from reportlab.pdfgen import canvas
+
+from app.utils.pdf_stamping import fit_signature, stamp_pdf
+from benchmarks.synthetic import make_pdf, make_signature_asset, initial_every_page
+
+PAGE_COUNTS = [10, 100, 1000]
+
+
+def legacy_stamp_pdf(pdf_path, out_path, placements):
+    """The old approach: a fresh canvas, serialised and re-parsed, for every stamped page"""
+    reader = PdfReader(pdf_path)
+    writer = PdfWriter()
+    by_page = {}
+    for pos, asset in placements:
+        by_page.setdefault(int(pos['page']), []).append((pos, asset))
+
+    for page_num, page in enumerate(reader.pages):
+        if page_num in by_page:
+            w_pt, h_pt = float(page.mediabox.width), float(page.mediabox.height)
+            packet = BytesIO()
+            c = canvas.Canvas(packet, pagesize=(w_pt, h_pt))
+            for pos, asset in by_page[page_num]:
+                x, top, width, height = fit_signature(pos, asset)
+                c.drawImage(asset.reader, x, h_pt - top - height, width=width, height=height,
+                            mask='auto', preserveAspectRatio=True)
+            c.save()
+            packet.seek(0)
+            page.merge_page(PdfReader(packet).pages[0])
+        writer.add_page(page)
+
+    with open(out_path, 'wb') as out_f:
+        writer.write(out_f)
+    return out_path
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run(page_counts=PAGE_COUNTS):
+    initial = make_signature_asset(200, 100, seed=1)
+    signature = make_signature_asset(600, 200, seed=2)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            src = make_pdf(os.path.join(tmp, f'in_{pages}.pdf'), pages)
+            placements = initial_every_page(pages, initial, signature)
+            legacy_out = os.path.join(tmp, f'legacy_{pages}.pdf')
+            overlay_out = os.path.join(tmp, f'overlay_{pages}.pdf')
+
+            results.append({
+                'pages': pages,
+                'input_bytes': os.path.getsize(src),
+                'legacy_s': timed(legacy_stamp_pdf, src, legacy_out, placements),
+                'legacy_bytes': os.path.getsize(legacy_out),
+                'overlay_s': timed(stamp_pdf, src, overlay_out, placements),
+                'overlay_bytes': os.path.getsize(overlay_out),
+            })
+    return results
+
+
+if __name__ == '__main__':
+    counts = [int(arg) for arg in sys.argv[1:]] or PAGE_COUNTS
+    print(f"{'pages':>6} {'legacy':>9} {'overlay':>9} {'legacy size':>12} {'overlay size':>13}")
+    for row in run(counts):
+        print(f"{row['pages']:>6} {row['legacy_s']:>8.2f}s {row['overlay_s']:>8.2f}s "
+              f"{row['legacy_bytes'] / 1024:>10.0f}KB {row['overlay_bytes'] / 1024:>11.0f}KB")
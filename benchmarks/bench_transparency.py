@@ -0,0 +1,72 @@
+# benchmarks/bench_transparency.py
+"""Compare the band-based signature transparency step with the old per-pixel loop.
+
+Usage: python -m benchmarks.bench_transparency
+"""
+import time
+from io import BytesIO
+
+from app.utils.signature_image import remove_background, prepare_signature_image
+from benchmarks.synthetic import make_signature_image, make_signature_png
+
+SIZES = [(300, 100), (1200, 400), (3000, 1000)]
+
+KEYS = ('size',)
+METRICS = {'banded_s': 'lower', 'pipeline_s': 'lower'}
+
+
+def legacy_remove_background(img):
+    """The loop manage_signature used before the band pipeline"""
+    img = img.convert('RGBA')
+    datas = img.getdata()
+    newData = []
+    for item in datas:
+        if item[0] > 240 and item[1] > 240 and item[2] > 240:
+            newData.append((255, 255, 255, 0))
+        else:
+            newData.append(item)
+    img.putdata(newData)
+    return img
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(repeat=3):
+    results = []
+    for width, height in SIZES:
+        source = make_signature_image(width, height)
+        png = make_signature_png(width, height)
+
+        legacy = best_of(lambda: legacy_remove_background(source.copy()), repeat)
+        banded = best_of(lambda: remove_background(source.convert('RGBA'), threshold=240), repeat)
+        # Full upload pipeline as the route runs it, including the downscale
+        pipeline = best_of(lambda: prepare_signature_image(BytesIO(png), 240, 16, 1200), repeat)
+
+        # With no feather the new engine must agree with the old loop on transparency
+        old_alpha = legacy_remove_background(source.copy()).getchannel('A')
+        new_alpha = remove_background(source.convert('RGBA'), threshold=240).getchannel('A')
+        assert old_alpha.tobytes() == new_alpha.tobytes(), 'alpha mismatch'
+
+        results.append({
+            'size': f'{width}x{height}',
+            'legacy_s': legacy,
+            'banded_s': banded,
+            'pipeline_s': pipeline,
+            'speedup': legacy / banded if banded else None,
+        })
+    return results
+
+
+if __name__ == '__main__':
+    print(f"{'size':>10} {'legacy':>10} {'banded':>10} {'pipeline':>10} {'speedup':>8}")
+    for row in run():
+        print(f"{row['size']:>10} {row['legacy_s'] * 1000:>8.1f}ms {row['banded_s'] * 1000:>8.1f}ms "
+              f"{row['pipeline_s'] * 1000:>8.1f}ms {row['speedup']:>7.0f}x")
@@ -0,0 +1,121 @@
+# benchmarks/check_parity.py
+"""Check that every stamping backend puts signatures in the same place.
+
+Signs synthetic PDFs (portrait, landscape, rotated and offset pages, every
+signature type) with each entry in BACKENDS, incremental and not, then reads
+back where each image was drawn with PyMuPDF. Every result must match the
+box fit_signature asks for to within TOLERANCE points. Exits with status 1 on
+any mismatch.
+
+Usage: python -m benchmarks.check_parity
+"""
+import os
+import sys
+import tempfile
+
+import pymupdf
+
+from app.utils.pdf_stamping import BACKENDS, fit_signature
+from benchmarks.synthetic import make_signature_asset
+
+TOLERANCE = 0.5  # Points
+
+SIGNATURE = make_signature_asset(600, 200, seed=2)
+INITIAL = make_signature_asset(200, 100, seed=1)
+COMPANY = make_signature_asset(400, 400, seed=3)
+
+PLACEMENTS = [
+    ({'page': 0, 'x': 72, 'y': 600, 'width': 150, 'height': 50, 'type': 'signature'}, SIGNATURE),
+    ({'page': 0, 'x': 400, 'y': 40, 'width': 80, 'height': 35, 'type': 'initial'}, INITIAL),
+    ({'page': 1, 'x': 300, 'y': 300, 'width': 250, 'height': 90, 'type': 'company'}, COMPANY),
+    ({'page': 1, 'x': 10, 'y': 10, 'width': 120, 'height': 120, 'type': 'signature'}, SIGNATURE),
+    ({'page': 2, 'x': 480, 'y': 500, 'width': 80, 'height': 35, 'type': 'initial'}, INITIAL),
+]
+
+# name -> (page size, rotation, MediaBox origin) for each of the three pages
+DOCUMENTS = {
+    'letter': ((612, 792), 0, (0, 0)),
+    'a4 landscape': ((842, 595), 0, (0, 0)),
+    'rotated 90': ((612, 792), 90, (0, 0)),
+    'offset mediabox': ((612, 792), 0, (36, 36)),
+}
+
+
+def make_document(path, size, rotation, origin):
+    doc = pymupdf.open()
+    for page_num in range(3):
+        page = doc.new_page(width=size[0], height=size[1])
+        page.insert_text((72, 72), f'Parity page {page_num + 1}')
+        if origin != (0, 0):
+            page.set_mediabox(pymupdf.Rect(origin[0], origin[1], origin[0] + size[0], origin[1] + size[1]))
+        page.set_rotation(rotation)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def expected_boxes(path):
+    """Where fit_signature says each placement goes, in MuPDF page coordinates"""
+    boxes = []
+    with pymupdf.open(path) as doc:
+        for pos, asset in PLACEMENTS:
+            page = doc[pos['page']]
+            x, top, width, height = fit_signature(pos, asset)
+            h_pt = page.mediabox.height
+            rect = pymupdf.Rect(x, h_pt - top - height, x + width, h_pt - top) * page.transformation_matrix
+            boxes.append((pos['page'], rect))
+    return sorted(boxes, key=_box_key)
+
+
+def drawn_boxes(path):
+    """Every image drawn on every page, as (page, rect)"""
+    boxes = []
+    with pymupdf.open(path) as doc:
+        for page in doc:
+            for info in page.get_image_info():
+                boxes.append((page.number, pymupdf.Rect(info['bbox'])))
+    return sorted(boxes, key=_box_key)
+
+
+def _box_key(box):
+    page, rect = box
+    return page, round(rect.y0), round(rect.x0)
+
+
+def worst_error(expected, drawn):
+    if len(expected) != len(drawn):
+        return float('inf')
+    worst = 0.0
+    for (page_a, a), (page_b, b) in zip(expected, drawn):
+        if page_a != page_b:
+            return float('inf')
+        worst = max(worst, abs(a.x0 - b.x0), abs(a.y0 - b.y0), abs(a.x1 - b.x1), abs(a.y1 - b.y1))
+    return worst
+
+
+def run():
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for doc_name, (size, rotation, origin) in DOCUMENTS.items():
+            src = make_document(os.path.join(tmp, 'in.pdf'), size, rotation, origin)
+            expected = expected_boxes(src)
+            for backend_name, stamp in BACKENDS.items():
+                for incremental in (False, True):
+                    out = os.path.join(tmp, f'{backend_name}_{incremental}.pdf')
+                    stamp(src, out, PLACEMENTS, incremental=incremental)
+                    results.append({
+                        'document': doc_name,
+                        'backend': backend_name + (' incremental' if incremental else ''),
+                        'error': worst_error(expected, drawn_boxes(out)),
+                    })
+    return results
+
+
+if __name__ == '__main__':
+    failed = False
+    print(f"{'document':>16} {'backend':>20} {'max error':>10}")
+    for row in run():
+        ok = row['error'] <= TOLERANCE
+        failed = failed or not ok
+        print(f"{row['document']:>16} {row['backend']:>20} {row['error']:>8.3f}pt {'ok' if ok else 'MISMATCH'}")
+    sys.exit(1 if failed else 0)
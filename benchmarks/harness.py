@@ -0,0 +1,140 @@
+# benchmarks/harness.py
+"""Run the benchmark suites and save the results as JSON, or compare two saved runs.
+
+Every suite is a module with run(), KEYS (the fields that identify a result
+row) and METRICS (metric name -> 'lower' or 'higher', whichever is better).
+Results are written with the commit they were measured on, so runs from two
+commits can be compared; compare exits with status 1 when any metric got
+worse by more than the threshold.
+
+Usage:
+    python -m benchmarks.harness run [--quick] [--suite signing ...] [--out FILE]
+    python -m benchmarks.harness compare BASE.json NEW.json [--threshold 0.1]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.config import Config
+from benchmarks import bench_autocomplete, bench_dashboard, bench_signing, bench_transparency
+
+SUITES = {
+    'signing': (bench_signing, lambda quick: bench_signing.run(quick=quick)),
+    'transparency': (bench_transparency, lambda quick: bench_transparency.run()),
+    'dashboard': (bench_dashboard, lambda quick: bench_dashboard.run(quick=quick)),
+    'autocomplete': (bench_autocomplete, lambda quick: bench_autocomplete.run(quick=quick)),
+}
+RESULTS_DIR = 'benchmark-results'
+
+
+def git_commit():
+    """(short commit hash, whether the tree has uncommitted changes), or (None, None) outside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def run_suites(names, quick):
+    commit, dirty = git_commit()
+    report = {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'quick': quick,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'pdf_backend': Config.PDF_BACKEND,
+            'signing_incremental': Config.SIGNING_INCREMENTAL,
+        },
+        'suites': {},
+    }
+    for name in names:
+        module, run = SUITES[name]
+        print(f'Running {name}...', file=sys.stderr)
+        start = time.perf_counter()
+        report['suites'][name] = {
+            'keys': list(module.KEYS),
+            'metrics': module.METRICS,
+            'results': run(quick),
+        }
+        report['suites'][name]['seconds'] = time.perf_counter() - start
+    return report
+
+
+def default_out_path(meta):
+    name = (meta['commit'] or 'unversioned') + ('-dirty' if meta['dirty'] else '') + ('-quick' if meta['quick'] else '')
+    return os.path.join(RESULTS_DIR, f'{name}.json')
+
+
+def compare(base, new, threshold):
+    """Yield (suite, row key, metric, base value, new value, relative change, regressed) for shared rows"""
+    for name, suite in new['suites'].items():
+        if name not in base['suites']:
+            continue
+        keys = suite['keys']
+        base_rows = {tuple(row[k] for k in keys): row for row in base['suites'][name]['results']}
+        for row in suite['results']:
+            key = tuple(row[k] for k in keys)
+            old = base_rows.get(key)
+            if old is None:
+                continue
+            for metric, better in suite['metrics'].items():
+                if not old.get(metric) or row.get(metric) is None:
+                    continue
+                change = (row[metric] - old[metric]) / old[metric]
+                worse = change if better == 'lower' else -change
+                yield name, key, metric, old[metric], row[metric], change, worse > threshold
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.harness')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run suites and save the results')
+    run_parser.add_argument('--quick', action='store_true', help='fewer and smaller cases')
+    run_parser.add_argument('--suite', action='append', choices=sorted(SUITES), help='repeat to run several')
+    run_parser.add_argument('--out', help=f'JSON file to write, by default under {RESULTS_DIR}/')
+    compare_parser = commands.add_parser('compare', help='compare two saved runs')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='relative change counted as a regression (default 0.1)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run_suites(args.suite or list(SUITES), args.quick)
+        out = args.out or default_out_path(report['meta'])
+        os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+        with open(out, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(out)
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"{base['meta']['commit']} -> {new['meta']['commit']}")
+    regressions = 0
+    for name, key, metric, old, value, change, regressed in compare(base, new, args.threshold):
+        regressions += regressed
+        label = ' '.join(str(part) for part in key)
+        print(f"{'REGRESSED' if regressed else '':>9} {name:>12} {label:>28} {metric:>20} "
+              f"{old:>12.4g} {value:>12.4g} {change:>+8.1%}")
+    print(f'{regressions} regression(s) over {args.threshold:.0%}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+# benchmarks/stress_concurrency.py
+"""Sign documents and load dashboards at the same time against a scratch SQLite database.
+
+The boss queues every pending document for signing from several threads while
+employees and the boss keep reloading their dashboards, and the signing
+workers write results back. Reports failed requests and jobs, "database is
+locked" errors and dashboard latency, once with the default SQLite settings
+(rollback journal, synchronous=FULL) and once with the tuned ones from Config.
+Nothing touches instance/app.db.
+
+Usage: python -m benchmarks.stress_concurrency [documents] [dashboard threads]
+"""
+import io
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from app import create_app, db
+from app.config import Config
+from app.models import Document, Signature, SigningJob, User
+from benchmarks.synthetic import make_pdf, make_signature_png
+
+SIGNER_THREADS = 4
+EMPLOYEES = 4
+
+
+class LockCounter(logging.Handler):
+    """Counts log records that mention a locked database"""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def emit(self, record):
+        if 'database is locked' in record.getMessage():
+            self.count += 1
+
+
+def make_config(tmp, tuned):
+    class StressConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'stress.db')
+        UPLOAD_FOLDER = os.path.join(tmp, 'uploads')
+        MAIL_SUPPRESS_SEND = True
+        MAIL_DEFAULT_SENDER = 'noreply@example.com'
+        PREVIEW_PRERENDER_PAGES = 0
+        SIGNING_RETRY_BACKOFF = 0.1
+
+    if not tuned:
+        # What SQLite and the sqlite3 module do out of the box
+        StressConfig.SQLITE_JOURNAL_MODE = 'DELETE'
+        StressConfig.SQLITE_SYNCHRONOUS = 'FULL'
+        StressConfig.SQLITE_BUSY_TIMEOUT = 5000
+        StressConfig.SQLITE_MMAP_SIZE = 0
+        StressConfig.SQLITE_CACHE_SIZE_KB = 2000
+    return StressConfig
+
+
+def login(app, email):
+    client = app.test_client()
+    client.post('/login', data={'email': email, 'password': 'password'})
+    return client
+
+
+def seed(app, documents, pdf_path):
+    """Users, a boss signature and pending documents uploaded through the upload route"""
+    with app.app_context():
+        db.create_all()
+        users = [User(username='boss', email='boss@example.com', role='boss')]
+        users += [User(username=f'employee{i}', email=f'employee{i}@example.com', role='employee')
+                  for i in range(EMPLOYEES)]
+        for user in users:
+            user.set_password('password')
+        db.session.add_all(users)
+        db.session.commit()
+
+    boss = login(app, 'boss@example.com')
+    boss.post('/signatures/manage-signature', content_type='multipart/form-data', data={
+        'signature': (io.BytesIO(make_signature_png(600, 200)), 'signature.png'),
+        'signature_type': 'signature',
+        'display_name': 'Stress test',
+    })
+    employees = [login(app, f'employee{i}@example.com') for i in range(EMPLOYEES)]
+    with open(pdf_path, 'rb') as f:
+        pdf = f.read()
+    for i in range(documents):
+        employees[i % EMPLOYEES].post('/upload', content_type='multipart/form-data', data={
+            'document': (io.BytesIO(pdf + f'\n% {i}\n'.encode()), f'contract{i}.pdf'),
+            'client': 'Acme', 'work': 'Audit', 'document_type': 'NDA', 'comment': '',
+        })
+    with app.app_context():
+        signature = Signature.query.first()
+        return signature.id, os.path.join(app.static_folder, signature.signature_path), \
+            [doc.id for doc in Document.query.all()]
+
+
+def run_once(tuned, documents, dashboard_threads):
+    tmp = tempfile.mkdtemp()
+    counter = LockCounter()
+    try:
+        app = create_app(make_config(tmp, tuned))
+        app.logger.addHandler(counter)
+        signature_id, signature_file, document_ids = seed(app, documents, make_pdf(os.path.join(tmp, 'in.pdf'), 3))
+
+        errors = []
+        latencies = []
+        signing_done = threading.Event()
+
+        def sign(ids):
+            client = login(app, 'boss@example.com')
+            for document_id in ids:
+                response = client.post(f'/signatures/sign-document/{document_id}', json={
+                    'signing_method': 'manual',
+                    'positions': [{'page': 0, 'x': 72, 'y': 600, 'width': 150, 'height': 50,
+                                   'type': 'signature', 'signatureId': signature_id}],
+                })
+                if response.status_code != 202:
+                    errors.append(f'sign {document_id}: {response.status_code}')
+
+        def browse(email):
+            client = login(app, email)
+            while not signing_done.is_set():
+                start = time.perf_counter()
+                response = client.get('/dashboard')
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors.append(f'dashboard {email}: {response.status_code}')
+
+        emails = ['boss@example.com'] + [f'employee{i}@example.com' for i in range(EMPLOYEES)]
+        readers = [threading.Thread(target=browse, args=(emails[i % len(emails)],)) for i in range(dashboard_threads)]
+        signers = [threading.Thread(target=sign, args=(document_ids[i::SIGNER_THREADS],)) for i in range(SIGNER_THREADS)]
+
+        start = time.perf_counter()
+        for thread in readers + signers:
+            thread.start()
+        for thread in signers:
+            thread.join()
+        with app.app_context():
+            while SigningJob.query.filter(SigningJob.status.in_(('queued', 'running'))).count():
+                db.session.rollback()  # Start a fresh read so new commits are seen
+                time.sleep(0.05)
+            elapsed = time.perf_counter() - start
+            failed_jobs = SigningJob.query.filter_by(status='failed').count()
+            retried_jobs = SigningJob.query.filter(SigningJob.attempts > 1).count()
+            signed = Document.query.filter_by(status='signed').count()
+        signing_done.set()
+        for thread in readers:
+            thread.join()
+
+        if os.path.exists(signature_file):
+            os.remove(signature_file)
+        return {
+            'settings': 'tuned' if tuned else 'default',
+            'signed': signed,
+            'documents': len(document_ids),
+            'seconds': elapsed,
+            'failed_requests': len(errors),
+            'failed_jobs': failed_jobs,
+            'retried_jobs': retried_jobs,
+            'locked_errors': counter.count,
+            'dashboard_loads': len(latencies),
+            'dashboard_p50': statistics.median(latencies) if latencies else 0,
+            'dashboard_p95': statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else 0,
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def run(documents=200, dashboard_threads=8):
+    return [run_once(tuned, documents, dashboard_threads) for tuned in (False, True)]
+
+
+if __name__ == '__main__':
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    dashboard_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    print(f"{'settings':>8} {'signed':>9} {'time':>8} {'failed req':>11} {'failed jobs':>12} {'retried':>8} "
+          f"{'locked':>7} {'loads':>6} {'p50':>8} {'p95':>8}")
+    for row in run(documents, dashboard_threads):
+        print(f"{row['settings']:>8} {row['signed']:>4}/{row['documents']:<4} {row['seconds']:>7.2f}s "
+              f"{row['failed_requests']:>11} {row['failed_jobs']:>12} {row['retried_jobs']:>8} "
+              f"{row['locked_errors']:>7} {row['dashboard_loads']:>6} "
+              f"{row['dashboard_p50'] * 1000:>6.0f}ms {row['dashboard_p95'] * 1000:>6.0f}ms")
@@ -0,0 +1,86 @@
+# benchmarks/synthetic.py
+"""Synthetic inputs for the benchmark scripts."""
+import random
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+
+def make_signature_image(width, height, seed=0):
+    """An RGB "phone scan" of a signature: off-white paper with noise and dark strokes"""
+    rng = random.Random(seed)
+    img = Image.new('RGB', (width, height), (250, 250, 248))
+    draw = ImageDraw.Draw(img)
+
+    # Paper grain so the threshold has something to do
+    for _ in range(width * height // 200):
+        x, y = rng.randrange(width), rng.randrange(height)
+        shade = rng.randint(225, 255)
+        draw.point((x, y), fill=(shade, shade, shade))
+
+    # A few pen strokes through the middle of the page
+    stroke = max(2, height // 60)
+    for _ in range(12):
+        points = [(rng.randrange(width // 10, width * 9 // 10), rng.randrange(height // 4, height * 3 // 4))
+                  for _ in range(6)]
+        draw.line(points, fill=(20, 20, 60), width=stroke)
+    return img
+
+
+def make_signature_png(width, height, seed=0):
+    """PNG bytes of make_signature_image()"""
+    buf = BytesIO()
+    make_signature_image(width, height, seed).save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def make_pdf(path, pages, page_size=(612, 792)):
+    """A plain text PDF with the given number of pages"""
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(path, pagesize=page_size)
+    for page_num in range(pages):
+        c.drawString(72, page_size[1] - 72, f'Synthetic contract page {page_num + 1} of {pages}')
+        for line in range(40):
+            c.drawString(72, page_size[1] - 100 - line * 15, 'Lorem ipsum dolor sit amet, consectetur adipiscing elit.')
+        c.showPage()
+    c.save()
+    return path
+
+
+def make_signature_asset(width, height, seed=0):
+    """A transparent SignatureAsset as the signer would load it from disk"""
+    from app.utils.signature_cache import SignatureAsset
+    from app.utils.signature_image import remove_background
+
+    img = remove_background(make_signature_image(width, height, seed), threshold=240)
+    return SignatureAsset(f'synthetic-{width}x{height}-{seed}.png', img)
+
+
+def initial_every_page(pages, initial, signature):
+    """Placements for an initial on every page plus a full signature on the last one"""
+    placements = [({'page': page_num, 'x': 480, 'y': 740, 'width': 80, 'height': 35, 'type': 'initial'}, initial)
+                  for page_num in range(pages)]
+    placements.append(({'page': pages - 1, 'x': 72, 'y': 600, 'width': 150, 'height': 50, 'type': 'signature'},
+                       signature))
+    return placements
+
+
+def make_scanned_pdf(path, pages, page_size=(612, 792), seed=0):
+    """A PDF of full-page grey noise images, like a scanned document: large on disk for its page count"""
+    import random
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    rng = random.Random(seed)
+    c = canvas.Canvas(path, pagesize=page_size)
+    for _ in range(pages):
+        # A different image per page, or ReportLab would embed it once
+        scan = Image.frombytes('L', (425, 550), rng.randbytes(425 * 550))
+        buf = BytesIO()
+        scan.save(buf, format='JPEG', quality=60)
+        buf.seek(0)
+        c.drawImage(ImageReader(buf), 0, 0, width=page_size[0], height=page_size[1])
+        c.showPage()
+    c.save()
+    return path
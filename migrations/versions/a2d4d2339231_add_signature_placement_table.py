@@ -0,0 +1,151 @@
+"""Add signature_placement table
+
+Revision ID: a2d4d2339231
+Revises: 30bc93460420
+Create Date: 2026-10-18 19:48:12.604931
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2d4d2339231'
+down_revision = '30bc93460420'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500  # Documents read per query while copying placements
+
+document = sa.table(
+    'document',
+    sa.column('id', sa.Integer),
+    sa.column('signature_placement', sa.Text),
+)
+signature_placement = sa.table(
+    'signature_placement',
+    sa.column('id', sa.Integer),
+    sa.column('document_id', sa.Integer),
+    sa.column('page', sa.Integer),
+    sa.column('x', sa.Float),
+    sa.column('y', sa.Float),
+    sa.column('width', sa.Float),
+    sa.column('height', sa.Float),
+    sa.column('type', sa.String),
+)
+
+
+def _optional_float(value):
+    return float(value) if value is not None else None
+
+
+def _placement_rows(document_id, placement_json):
+    """Rows for the positions in one document's JSON. Entries signing could not have used are left out."""
+    try:
+        positions = json.loads(placement_json)
+    except ValueError:
+        return []
+    rows = []
+    for pos in positions if isinstance(positions, list) else []:
+        try:
+            rows.append({
+                'document_id': document_id,
+                'page': int(pos['page']),
+                'x': float(pos['x']),
+                'y': float(pos['y']),
+                'width': _optional_float(pos.get('width')),
+                'height': _optional_float(pos.get('height')),
+                'type': pos.get('type') or 'signature',
+            })
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+    return rows
+
+
+def _copy_json_to_rows(connection):
+    last_id = 0
+    while True:
+        batch = connection.execute(
+            sa.select(document.c.id, document.c.signature_placement)
+            .where(document.c.id > last_id, document.c.signature_placement.isnot(None))
+            .order_by(document.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            return
+        rows = [row for document_id, placement_json in batch for row in _placement_rows(document_id, placement_json)]
+        if rows:
+            connection.execute(signature_placement.insert(), rows)
+        last_id = batch[-1].id
+
+
+def _copy_rows_to_json(connection):
+    last_id = 0
+    while True:
+        document_ids = connection.execute(
+            sa.select(signature_placement.c.document_id).distinct()
+            .where(signature_placement.c.document_id > last_id)
+            .order_by(signature_placement.c.document_id)
+            .limit(BATCH_SIZE)
+        ).scalars().all()
+        if not document_ids:
+            return
+        positions = {}
+        for row in connection.execute(
+            sa.select(signature_placement)
+            .where(signature_placement.c.document_id.in_(document_ids))
+            .order_by(signature_placement.c.document_id, signature_placement.c.id)
+        ):
+            pos = {'page': row.page, 'x': row.x, 'y': row.y, 'type': row.type}
+            if row.width is not None:
+                pos['width'] = row.width
+            if row.height is not None:
+                pos['height'] = row.height
+            positions.setdefault(row.document_id, []).append(pos)
+        connection.execute(
+            document.update().where(document.c.id == sa.bindparam('document_id'))
+            .values(signature_placement=sa.bindparam('placement_json')),
+            [{'document_id': document_id, 'placement_json': json.dumps(document_positions)}
+             for document_id, document_positions in positions.items()]
+        )
+        last_id = document_ids[-1]
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('signature_placement',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('page', sa.Integer(), nullable=False),
+    sa.Column('x', sa.Float(), nullable=False),
+    sa.Column('y', sa.Float(), nullable=False),
+    sa.Column('width', sa.Float(), nullable=True),
+    sa.Column('height', sa.Float(), nullable=True),
+    sa.Column('type', sa.String(length=20), nullable=False),
+    sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('signature_placement', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_signature_placement_document_id'), ['document_id'], unique=False)
+
+    # ### end Alembic commands ###
+    _copy_json_to_rows(op.get_bind())
+
+    with op.batch_alter_table('document', schema=None) as batch_op:
+        batch_op.drop_column('signature_placement')
+
+
+def downgrade():
+    with op.batch_alter_table('document', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('signature_placement', sa.TEXT(), nullable=True))
+
+    _copy_rows_to_json(op.get_bind())
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('signature_placement', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_signature_placement_document_id'))
+
+    op.drop_table('signature_placement')
+    # ### end Alembic commands ###
@@ -0,0 +1,39 @@
+"""Add document search index
+
+Revision ID: f39abaad6b3f
+Revises: a7fdde7905c2
+Create Date: 2026-10-18 17:05:44.902316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f39abaad6b3f'
+down_revision = 'a7fdde7905c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite only; other databases search the document columns directly
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS document_search USING fts5("
+        "original_filename, client, work, document_type, comment, body, "
+        "tokenize = 'porter unicode61 remove_diacritics 2')"
+    )
+    # Document text is extracted for new uploads; run "flask reindex-search" to add it for existing ones
+    op.execute(
+        "INSERT INTO document_search (rowid, original_filename, client, work, document_type, comment, body) "
+        "SELECT id, coalesce(original_filename, ''), coalesce(client, ''), coalesce(work, ''), "
+        "coalesce(document_type, ''), coalesce(comment, ''), '' FROM document"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TABLE IF EXISTS document_search")
@@ -46,6 +46,15 @@ def create_default_users():
 
     print("Default users created.")
 
+@app.cli.command('reindex-search')
+def reindex_search():
+    """Rebuild the document search index, extracting the text of every PDF."""
+    import click
+    from app.search_index import rebuild_index
+
+    count = rebuild_index()
+    click.echo(f'Search index rebuilt; text indexed for {count} file(s).')
+
 if __name__ == '__main__':
     with app.app_context():
         # Create all database tables